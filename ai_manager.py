@@ -0,0 +1,744 @@
+import random
+import math
+import operator
+import time
+import json
+import logging
+import queue
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from game import Phases, MOVE_END, MOVE_CARD, MOVE_ABILITY, MOVE_BUILD_ARMY, MOVE_BUILD_CITY, MOVE_ARMY, MOVE_DESTROY, MOVE_JOKER, encode_move
+from snapshot import encode_game, decode_game
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:
+    #Not on Windows, the peak memory is then not sampled
+    resource = None
+
+def peak_memory_kb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+#Runs in a worker process - plays its share of rollouts of every option from a binary game snapshot
+def simulate_options(task):
+    snapshot, options, sim_lengths, offsets, seed, deadline, batch_size, timing = task
+    game = decode_game(snapshot)
+    manager = AI_manager(0, batch_size=batch_size)
+    manager.timing = timing
+    return manager.run_playouts(game, options, sim_lengths, deadline, seed, offsets) + (manager.stats,)
+
+#Random stream of one playout, split from the seed of the decision
+#A playout plays the same whichever worker runs it, so the result does not depend on the number of workers
+def playout_rng(seed, option_index, playout):
+    return random.Random(seed << 64 | option_index << 32 | playout)
+
+#One JSON line per AI decision, written through the file buffer
+class DecisionTrace:
+    def __init__(self, path):
+        self.file = open(path, "a", buffering=1 << 16)
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+#Counters and timers of one AI decision, or of several added together
+class SearchStats:
+    TIMERS = ("clone_game", "create_options", "apply_move", "rollback")
+
+    def __init__(self):
+        self.decisions = 0
+        self.playouts = 0
+        #Playouts played move by move, batched playouts are only in playouts
+        self.rollouts = 0
+        self.rollout_moves = 0
+        self.nodes_expanded = 0
+        self.seconds = 0
+        self.timers = dict.fromkeys(self.TIMERS, 0.0)
+        self.peak_memory_kb = None
+
+    def add(self, other):
+        self.decisions += other.decisions
+        self.playouts += other.playouts
+        self.rollouts += other.rollouts
+        self.rollout_moves += other.rollout_moves
+        self.nodes_expanded += other.nodes_expanded
+        self.seconds += other.seconds
+        for name in self.TIMERS:
+            self.timers[name] += other.timers[name]
+        if other.peak_memory_kb is not None:
+            self.peak_memory_kb = max(self.peak_memory_kb or 0, other.peak_memory_kb)
+
+    def summary(self):
+        return {
+            "decisions": self.decisions,
+            "playouts": self.playouts,
+            "playouts_per_second": self.playouts / self.seconds if self.seconds > 0 else 0,
+            "average_rollout_length": self.rollout_moves / self.rollouts if self.rollouts > 0 else 0,
+            "nodes_expanded": self.nodes_expanded,
+            "seconds": self.seconds,
+            "timers": dict(self.timers),
+            "peak_memory_kb": self.peak_memory_kb
+        }
+
+class AI_manager:
+    def __init__(self, sim_length, workers=0, time_budget=None, batch_size=0, seed=None, trace_path=None):
+        self.real_options = []
+        self.sim_options = []
+        self.real_instruction = []
+        self.weights = []
+        self.playout_counts = []
+        self.sim_length = sim_length
+        self.workers = workers
+        #Seconds per decision, sim_length then only caps the number of playouts
+        self.time_budget = time_budget
+        self.playouts = 0
+        self.pool = None
+        #Playouts run together as numpy batches of this size, 0 plays them one by one
+        self.batch_size = batch_size
+        self.batch_tables = None
+        #Results of the last decision's playouts by the state after the option and the first move played from it
+        #The next decision starts from them when the game gets to one of those states, e.g. in the rest of the same move
+        #or at the start of the next turn - the card drawn for it is left out of the key by follow_up_key
+        self.follow_ups = {}
+        #Own random stream, every decision splits a seed for its playouts from it
+        self.rng = random.Random(seed)
+        #Decision trace file, None writes no trace
+        self.trace = DecisionTrace(trace_path) if trace_path is not None else None
+        #Stats of the running search, of the last decision and of all decisions, the timers only run when timing is switched on
+        #Pondering collects its own stats, they are never added to the decisions
+        self.stats = SearchStats()
+        self.last_stats = SearchStats()
+        self.total_stats = SearchStats()
+        self.timing = False
+        #Set from another thread to end the running search early, it then plays the best move found so far
+        self.interrupted = False
+        #Set by AI_thread when it searches during the other players' turns
+        self.pondering = False
+
+    def get_pool(self):
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers)
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    def get_deadline(self):
+        if self.time_budget is None:
+            return None
+        return time.time() + self.time_budget
+
+    def split_sim_length(self, sim_length):
+        chunks = [sim_length // self.workers] * self.workers
+        for i in range(sim_length % self.workers):
+            chunks[i] += 1
+        return chunks
+
+    def run_playouts(self, thegame, options, sim_lengths, deadline, seed, offsets=None):
+        #Round robin over the options, so when the deadline comes every option has about the same number of playouts
+        #offsets are the numbers of the first playouts of every option, when the playouts are split between workers
+        if offsets is None:
+            offsets = [0] * len(options)
+        weights = [0] * len(options)
+        counts = [0] * len(options)
+        follow_ups = {}
+        remaining = sum(sim_lengths)
+        option_index = 0
+        #All playouts run on one working copy, which is rolled back after each of them
+        sim = self.timed("clone_game", thegame.clone_game)
+        checkpoint = sim.checkpoint()
+        while remaining > 0 and not self.interrupted and (deadline is None or time.time() < deadline):
+            if counts[option_index] < sim_lengths[option_index]:
+                sim.rng = playout_rng(seed, option_index, offsets[option_index] + counts[option_index])
+                if self.batch_size > 0:
+                    playouts = min(self.batch_size, sim_lengths[option_index] - counts[option_index])
+                    weights[option_index] += self.SimulateBatch(sim, options[option_index], playouts)
+                else:
+                    playouts = 1
+                    weights[option_index] += self.SimulateGame(sim, options[option_index], follow_ups)
+                self.timed("rollback", sim.rollback, checkpoint)
+                counts[option_index] += playouts
+                remaining -= playouts
+                self.playouts += playouts
+            option_index = (option_index + 1) % len(options)
+        return weights, counts, follow_ups
+
+    def parallel_playouts(self, thegame, sim_lengths, deadline, seed):
+        #Every playout gets its own random stream, the snapshot leaves out the one of the game
+        snapshot = encode_game(thegame, rng=False)
+        tasks = []
+        offsets = [0] * len(sim_lengths)
+        for chunks in zip(*[self.split_sim_length(sim_length) for sim_length in sim_lengths]):
+            if sum(chunks) > 0:
+                tasks.append((snapshot, self.real_options, list(chunks), offsets, seed, deadline, self.batch_size, self.timing))
+                offsets = list(map(operator.add, offsets, chunks))
+        weights = [0] * len(self.real_options)
+        counts = [0] * len(self.real_options)
+        follow_ups = {}
+        #imap keeps the task order, so the merged weights do not depend on which worker finished first
+        results = self.get_pool().imap(simulate_options, tasks)
+        for _ in tasks:
+            #Waits in short steps, so an interrupt stops the workers instead of waiting for the whole decision
+            while True:
+                try:
+                    task_weights, task_counts, task_follow_ups, task_stats = results.next(0.05)
+                    break
+                except multiprocessing.TimeoutError:
+                    if self.interrupted:
+                        #The tasks that already finished are kept, the rest are dropped with the pool
+                        self.pool.terminate()
+                        self.pool = None
+                        return weights, counts, follow_ups
+            for option_index in range(len(self.real_options)):
+                weights[option_index] += task_weights[option_index]
+                counts[option_index] += task_counts[option_index]
+            self.playouts += sum(task_counts)
+            self.merge_follow_ups(follow_ups, task_follow_ups)
+            #Timers of the workers add up their time, not the wall clock time of the decision
+            self.stats.add(task_stats)
+        return weights, counts, follow_ups
+
+    def merge_follow_ups(self, follow_ups, other):
+        for state_hash, moves in other.items():
+            state_moves = follow_ups.setdefault(state_hash, {})
+            for move, (weight, count) in moves.items():
+                stats = state_moves.setdefault(move, [0, 0])
+                stats[0] += weight
+                stats[1] += count
+
+    def follow_up_key(self, thegame):
+        #Hash of the state without the card drawn at the start of the turn, so the follow-ups of ending a move fit whichever card gets drawn
+        state = thegame.state
+        if state.phase != Phases.PickCard or not state.active_cards:
+            return state.hash
+        drawn_card = state.active_cards[-1]
+        return state.hash ^ thegame.zobrist.count_key("active_cards", drawn_card, len(state.active_cards)) ^ thegame.zobrist.count_key("deck_cards", drawn_card, 1)
+
+    def average_weights(self):
+        #Options that did not get a single playout before the deadline are never preferred
+        return [weight / count if count > 0 else -1 for weight, count in zip(self.weights, self.playout_counts)]
+
+    def pass_real_instruction(self):
+        instruction = self.real_instruction[0]
+        self.real_instruction.pop(0)
+        return instruction
+
+    #Options are moves encoded by game.encode_move, built from the per-player tile indexes of the state instead of scanning the board
+    def create_options(self, used_game):
+        options = []
+        state = used_game.state
+        phase = state.phase
+        if phase == Phases.PickCard:
+            options = self.CardOptions(used_game)
+        elif phase == Phases.PickAbilityOR or phase == Phases.PickAbilityAND:
+            options = [encode_move(MOVE_ABILITY, ability_position) for ability_position in range(len(state.viable_abilities))]
+        elif phase == Phases.BuildArmy and state.manuevers and state.player_armies[state.active_player] < used_game.max_armies:
+            options = self.ArmyBuildingOptions(used_game)
+        elif phase == Phases.BuildCity and state.manuevers and state.player_cities[state.active_player] < used_game.max_cities:
+            options = self.CityBuildingOptions(used_game)
+        elif (phase == Phases.MoveArmy or phase == Phases.SailArmy) and state.manuevers:
+            options = self.MovingOptions(used_game)
+        elif phase == Phases.DestroyArmy and state.manuevers:
+            options = self.DestroyOptions(used_game)
+        elif phase == Phases.JokerAssignment and state.manuevers:
+            options = [encode_move(MOVE_JOKER, 0, good.index) for good in used_game.deck.good_list]
+        #Nothing to do (or nowhere to build) ends the move
+        if not options:
+            options.append(MOVE_END)
+        return options
+
+    def CardOptions(self, used_game):
+        options = []
+        coins = used_game.state.coins[used_game.state.active_player]
+
+        for card in used_game.get_active_cards():
+            if used_game.card_cost(card) <= coins:
+                options.append(encode_move(MOVE_CARD, card.index))
+        return options
+
+    def ArmyBuildingOptions(self, used_game):
+        state = used_game.state
+        tiles = set(state.city_tiles[state.active_player])
+        tiles.update(tile.index for tile in used_game.board.starting_tiles)
+        return [encode_move(MOVE_BUILD_ARMY, 0, tile_index) for tile_index in sorted(tiles)]
+
+    def CityBuildingOptions(self, used_game):
+        state = used_game.state
+        return [encode_move(MOVE_BUILD_CITY, 0, tile_index) for tile_index in state.army_tiles[state.active_player]]
+
+    def MovingOptions(self, used_game):
+        options = []
+        state = used_game.state
+        move_targets = used_game.board.move_targets(state.phase == Phases.SailArmy)
+        for tile_index in state.army_tiles[state.active_player]:
+            for target_index in move_targets[tile_index]:
+                options.append(encode_move(MOVE_ARMY, tile_index, target_index))
+        options.append(MOVE_END)
+        return options
+
+    def DestroyOptions(self, used_game):
+        options = []
+        state = used_game.state
+        for player_index in range(len(used_game.players)):
+            if player_index == state.active_player:
+                continue
+            for tile_index in state.army_tiles[player_index]:
+                options.append(encode_move(MOVE_DESTROY, player_index, tile_index))
+        options.append(MOVE_END)
+        return options
+
+    def pick_random_instruction(self, options, rng=None):
+        if rng is None:
+            rng = self.rng
+        if len(options) == 1:
+            return options[0]
+        if isinstance(options, dict):
+            keys = list(options.keys())
+            random_key = rng.choice(keys)
+            instruction = options[random_key]
+        else:
+            instruction = rng.choice(options)
+        return instruction
+
+    def pick_best_instruction(self, options, weights):
+        if isinstance(options, dict):
+            keys = list(options.keys())
+            random_key = self.rng.choice(keys)
+            instruction = options[random_key]
+        else:
+            return options[weights.index(max(weights))]
+        return instruction
+
+    def choose_instruction(self, thegame):
+        self.real_options = self.create_options(thegame)
+        logger.debug("%s options %s", thegame.state.phase, self.real_options)
+        self.weights = []
+        self.playout_counts = []
+        self.playouts = 0
+        if len(self.real_options) == 1:
+            return self.real_options[0]
+        #Playouts of the previous decision that went through this state count towards sim_length of their first move
+        previous = self.follow_ups.get(self.follow_up_key(thegame), {})
+        prior_weights = [previous.get(option, (0, 0))[0] for option in self.real_options]
+        prior_counts = [previous.get(option, (0, 0))[1] for option in self.real_options]
+        sim_lengths = [max(0, self.sim_length - count) for count in prior_counts]
+        deadline = self.get_deadline()
+        seed = self.rng.getrandbits(64)
+        if self.workers > 1:
+            self.weights, self.playout_counts, self.follow_ups = self.parallel_playouts(thegame, sim_lengths, deadline, seed)
+        else:
+            self.weights, self.playout_counts, self.follow_ups = self.run_playouts(thegame, self.real_options, sim_lengths, deadline, seed)
+        self.playouts = sum(self.playout_counts)
+        self.weights = list(map(operator.add, self.weights, prior_weights))
+        self.playout_counts = list(map(operator.add, self.playout_counts, prior_counts))
+        return self.pick_best_instruction(self.real_options, self.average_weights())
+
+    #One decision with its stats, log line and trace record
+    def decide(self, thegame):
+        self.stats = SearchStats()
+        start = time.time()
+        move = self.choose_instruction(thegame)
+        seconds = time.time() - start
+        self.stats.decisions = 1
+        self.stats.playouts = self.playouts
+        self.stats.seconds = seconds
+        self.stats.peak_memory_kb = peak_memory_kb()
+        self.total_stats.add(self.stats)
+        self.last_stats = self.stats
+        logger.info("Player %d chose %d from %d options with %d playouts in %.3fs",
+                    thegame.state.active_player, move, len(self.real_options), self.playouts, seconds)
+        logger.debug("Weights %s", self.weights)
+        if self.trace is not None:
+            self.write_trace(thegame, move, seconds)
+        return move
+
+    #Playouts from a state where another player is on the move, until sim_length per option or until interrupted
+    #They leave follow-ups for the states after the move, which the next decision uses like those of its own playouts
+    def ponder(self, thegame):
+        self.stats = SearchStats()
+        options = self.create_options(thegame)
+        self.playouts = 0
+        follow_ups = self.run_playouts(thegame, options, [self.sim_length] * len(options), None, self.rng.getrandbits(64))[2]
+        self.merge_follow_ups(self.follow_ups, follow_ups)
+
+    def AI_loop(self, thegame):
+        if len(self.real_instruction) < 1:
+            self.real_instruction.append(self.decide(thegame))
+        else:
+            logger.debug("Player %d plays %d", thegame.state.active_player, self.real_instruction[0])
+            thegame.apply_move(self.pass_real_instruction())
+
+    def write_trace(self, thegame, move, seconds):
+        state = thegame.state
+        self.trace.write({
+            "turn": state.turn,
+            "player": state.active_player,
+            "phase": state.phase.name,
+            "options": self.real_options,
+            "weights": self.weights,
+            "counts": self.playout_counts,
+            "playouts": self.playouts,
+            "move": move,
+            "seconds": seconds
+        })
+
+    def timed(self, name, function, *args):
+        if not self.timing:
+            return function(*args)
+        start = time.perf_counter()
+        result = function(*args)
+        self.stats.timers[name] += time.perf_counter() - start
+        return result
+
+    #Moves and card draws of a playout both come from the random stream of sim
+    def random_playout(self, sim):
+        #With timing both halves of every move are timed
+        timing = self.timing
+        timers = self.stats.timers
+        clock = time.perf_counter
+        moves = 0
+        while sim.state.phase != Phases.EndGame:
+            if timing:
+                start = clock()
+            self.sim_options = self.create_options(sim)
+            if timing:
+                middle = clock()
+            sim.apply_move(self.pick_random_instruction(self.sim_options, sim.rng))
+            if timing:
+                timers["create_options"] += middle - start
+                timers["apply_move"] += clock() - middle
+            moves += 1
+        self.stats.rollouts += 1
+        self.stats.rollout_moves += moves
+        return sim.state.winners
+
+    def result_weight(self, player_index, winners):
+        if player_index not in winners:
+            return 0
+        elif len(winners) == 1:
+            return 3
+        else:
+            return 1
+
+    def SimulateGame(self, sim, initial_instruction, follow_ups=None):
+        #Plays on sim in place, the caller rolls it back to its checkpoint afterwards
+        player_index = sim.state.active_player
+        sim.apply_move(initial_instruction)
+        if follow_ups is None or sim.state.phase == Phases.EndGame:
+            return self.result_weight(player_index, self.random_playout(sim))
+        #The first move of the playout is kept with the result for the player making it, for the decision after this one
+        state_hash = self.follow_up_key(sim)
+        next_player = sim.state.active_player
+        move = self.pick_random_instruction(self.create_options(sim), sim.rng)
+        sim.apply_move(move)
+        winners = self.random_playout(sim)
+        stats = follow_ups.setdefault(state_hash, {}).setdefault(move, [0, 0])
+        stats[0] += self.result_weight(next_player, winners)
+        stats[1] += 1
+        return self.result_weight(player_index, winners)
+
+    def SimulateBatch(self, sim, initial_instruction, playouts):
+        #numpy is only needed when batched playouts are switched on
+        import numpy
+        from batch_rollout import BatchRollout, BatchTables
+        player_index = sim.state.active_player
+        sim.apply_move(initial_instruction)
+        if self.batch_tables is None or self.batch_tables.board is not sim.board or self.batch_tables.deck is not sim.deck:
+            self.batch_tables = BatchTables(sim)
+        batch = BatchRollout(sim, playouts, numpy.random.default_rng(sim.rng.getrandbits(64)), self.batch_tables)
+        return batch.result_weight(batch.run(), player_index)
+
+#Playout statistics per Zobrist hash of a state, shared by every node that gets to the same state
+#Bounded - when it is full the least recently used state is dropped
+class TranspositionTable:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, state_hash):
+        #[visits, rewards per player] or None
+        entry = self.entries.get(state_hash)
+        if entry is not None:
+            self.entries.move_to_end(state_hash)
+        return entry
+
+    def record(self, state_hash, player_count):
+        entry = self.lookup(state_hash)
+        if entry is None:
+            entry = self.entries[state_hash] = [0, [0] * player_count]
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return entry
+
+class UCT_node:
+    def __init__(self, game, parent=None, instruction=None):
+        self.game = game
+        self.parent = parent
+        self.instruction = instruction
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        #Playouts this search ran through the node, without those taken over from the transposition table
+        self.played = 0
+        self.rewards = [0] * len(game.players)
+
+#A move that draws a card - every visit plays it again with a new draw, the children are the states the draws led to by their hash
+#game is the game the move is played from, the node has no game of its own
+class UCT_chance:
+    def __init__(self, game, parent, instruction):
+        self.game = game
+        self.parent = parent
+        self.instruction = instruction
+        self.children = []
+        self.outcomes = {}
+        self.visits = 0
+        #Playouts this search ran through the node, without those taken over from the transposition table
+        self.played = 0
+        self.rewards = [0] * len(game.players)
+
+#Monte Carlo tree search - sim_length is the number of playouts for the whole decision, not per option
+class UCT_manager(AI_manager):
+    def __init__(self, sim_length, exploration=1.4, time_budget=None, transposition_size=50000, seed=None, trace_path=None):
+        super().__init__(sim_length, time_budget=time_budget, seed=seed, trace_path=trace_path)
+        self.exploration = exploration
+        self.root = None
+        #0 switches the transposition table off
+        self.transpositions = TranspositionTable(transposition_size) if transposition_size > 0 else None
+
+    def find_root(self, thegame):
+        #The subtree of the previous decision is kept as long as the game got to a state in it, in the rest of the move or after the other players' moves
+        #Draws are chance nodes, so a new turn is found under whichever card was drawn if the search played that draw
+        state = thegame.state
+        nodes = deque([self.root] if self.root is not None else [])
+        while nodes:
+            node = nodes.popleft()
+            if node.__class__ is UCT_node and node.game.state.hash == state.hash and node.game.state.key() == state.key():
+                node.parent = None
+                return node
+            nodes.extend(node.children)
+        #Every game in the tree draws its cards from the stream of the AI
+        return UCT_node(self.timed("clone_game", thegame.clone_game, self.rng))
+
+    def select_child(self, node):
+        player_index = node.game.state.active_player
+        log_visits = math.log(node.visits)
+        best_child = None
+        best_value = -1
+        for child in node.children:
+            value = child.rewards[player_index] / (3 * child.visits) + self.exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best_child = child
+                best_value = value
+        return best_child
+
+    def expand(self, node):
+        instruction = node.untried.pop(self.rng.randrange(len(node.untried)))
+        child_game = self.timed("clone_game", node.game.clone_game, self.rng)
+        self.timed("apply_move", child_game.apply_move, instruction)
+        if len(child_game.state.deck_cards) != len(node.game.state.deck_cards):
+            #The move drew a card, the child is the first outcome of its chance node
+            chance = UCT_chance(node.game, node, instruction)
+            node.children.append(chance)
+            return self.add_outcome(chance, child_game)
+        child = self.new_child(child_game, node, instruction)
+        node.children.append(child)
+        return child
+
+    def draw_outcome(self, chance):
+        #Node of the state a new draw leads to, and whether it was just added
+        child_game = self.timed("clone_game", chance.game.clone_game, self.rng)
+        self.timed("apply_move", child_game.apply_move, chance.instruction)
+        child = chance.outcomes.get(child_game.state.hash)
+        if child is not None:
+            return child, False
+        return self.add_outcome(chance, child_game), True
+
+    def add_outcome(self, chance, child_game):
+        child = self.new_child(child_game, chance, chance.instruction)
+        chance.outcomes[child_game.state.hash] = child
+        chance.children.append(child)
+        return child
+
+    def new_child(self, child_game, parent, instruction):
+        child = UCT_node(child_game, parent, instruction)
+        self.stats.nodes_expanded += 1
+        if self.transpositions is not None:
+            #A state already reached by another order of moves starts with the playouts played from it so far
+            entry = self.transpositions.lookup(child_game.state.hash)
+            if entry is not None:
+                child.visits = entry[0]
+                child.rewards = entry[1][:]
+        return child
+
+    def backpropagate(self, node, winners):
+        while node is not None:
+            node.visits += 1
+            node.played += 1
+            for player_index in winners:
+                node.rewards[player_index] += self.result_weight(player_index, winners)
+            #A chance node shares its game with its parent, which records the state
+            if self.transpositions is not None and node.__class__ is UCT_node:
+                entry = self.transpositions.record(node.game.state.hash, len(node.rewards))
+                entry[0] += 1
+                for player_index in winners:
+                    entry[1][player_index] += self.result_weight(player_index, winners)
+            node = node.parent
+
+    def search_iteration(self, root):
+        node = root
+        while node.game.state.phase != Phases.EndGame:
+            if node.__class__ is UCT_chance:
+                node, added = self.draw_outcome(node)
+                if added:
+                    break
+                continue
+            if node.untried is None:
+                node.untried = self.timed("create_options", self.create_options, node.game)
+            if len(node.untried) > 0:
+                node = self.expand(node)
+                break
+            node = self.select_child(node)
+        #The playout runs on the node's own game and is rolled back, so nodes do not need a clone for it
+        checkpoint = node.game.checkpoint()
+        winners = self.random_playout(node.game)
+        self.timed("rollback", node.game.rollback, checkpoint)
+        self.backpropagate(node, winners)
+
+    def choose_instruction(self, thegame):
+        root = self.find_root(thegame)
+        self.real_options = self.create_options(thegame)
+        logger.debug("%s options %s", thegame.state.phase, self.real_options)
+        self.playouts = 0
+        if len(self.real_options) == 1:
+            self.weights = []
+            self.playout_counts = []
+            self.root = None
+            for child in root.children:
+                if child.instruction == self.real_options[0]:
+                    self.root = child
+            return self.real_options[0]
+        #Playouts run from the root by earlier decisions or by pondering count towards sim_length
+        reused = root.played
+        deadline = self.get_deadline()
+        while self.playouts == 0 or (self.playouts + reused < self.sim_length and not self.interrupted and (deadline is None or time.time() < deadline)):
+            self.search_iteration(root)
+            self.playouts += 1
+        self.real_options = [child.instruction for child in root.children]
+        self.weights = [child.visits for child in root.children]
+        self.playout_counts = self.weights
+        self.root = max(root.children, key=lambda child: child.visits)
+        return self.root.instruction
+
+    def ponder(self, thegame):
+        #The tree grows from the current state, the next decision finds its root in it if the other players make moves it went through
+        self.stats = SearchStats()
+        root = self.root = self.find_root(thegame)
+        self.playouts = 0
+        while self.playouts < self.sim_length and not self.interrupted:
+            self.search_iteration(root)
+            self.playouts += 1
+
+#Runs the decisions of an AI manager in a background thread, so the pygame loop keeps drawing and handling events while it searches
+#The search gets a clone of the game, the move is played on the real game by poll in the caller's thread
+#With ponder it also searches during the other players' turns, the next decision keeps what fits the moves they made
+class AI_thread:
+    def __init__(self, ai_manager, ponder=False):
+        self.ai_manager = ai_manager
+        self.ai_manager.pondering = ponder
+        self.requests = queue.Queue()
+        self.responses = queue.Queue()
+        #Hash of the state the pending search was asked for, None when the AI is not thinking
+        self.pending = None
+        #Hash of the last state given to ponder
+        self.pondered = None
+        self.started = None
+        self.last_seconds = 0
+        self.closed = False
+        #Interrupting the running search and queueing the next one happen together, so a new search never misses its interrupt
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            kind, state_hash, game = request
+            with self.lock:
+                if not self.closed:
+                    self.ai_manager.interrupted = False
+                #A state that is already followed by another request is not worth pondering
+                stale = not self.requests.empty()
+            try:
+                if kind == "decide":
+                    self.responses.put((state_hash, self.ai_manager.decide(game)))
+                elif not stale:
+                    self.ai_manager.ponder(game)
+            except Exception:
+                #The thread keeps serving requests, a failed decision answers with no move so the caller stops waiting for it
+                logger.exception("AI %s failed", kind)
+                if kind == "decide":
+                    self.responses.put((state_hash, None))
+
+    def thinking(self):
+        return self.pending is not None
+
+    def request(self, thegame):
+        if self.pending is None:
+            self.pending = thegame.state.hash
+            self.started = time.time()
+            #A running ponder ends and the decision starts from what it found
+            with self.lock:
+                self.ai_manager.interrupted = True
+                self.requests.put(("decide", self.pending, thegame.clone_game()))
+
+    def ponder(self, thegame):
+        #Called every frame of the other players' turns, only a new state starts a new search
+        if self.ai_manager.pondering and self.pending is None and self.pondered != thegame.state.hash:
+            self.pondered = thegame.state.hash
+            with self.lock:
+                self.ai_manager.interrupted = True
+                self.requests.put(("ponder", self.pondered, thegame.clone_game()))
+
+    def poll(self, thegame):
+        #Plays the move once it is ready, True when it did
+        try:
+            state_hash, move = self.responses.get_nowait()
+        except queue.Empty:
+            return False
+        self.pending = None
+        self.last_seconds = time.time() - self.started
+        if move is None:
+            #The search failed, the next request asks again
+            return False
+        if state_hash != thegame.state.hash:
+            #The game went on without the AI, the move belongs to a state that is gone
+            return False
+        logger.debug("Player %d plays %d", thegame.state.active_player, move)
+        thegame.apply_move(move)
+        return True
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.ai_manager.interrupted = True
+            self.requests.put(None)
+        self.thread.join()
+        self.ai_manager.close()
@@ -0,0 +1,339 @@
+import numpy as np
+from game import Phases, BuildArmies, BuildCities, MoveArmies, DestroyArmies, SailArmies
+
+PICK_CARD = 0
+PICK_ABILITY_AND = 1
+PICK_ABILITY_OR = 2
+BUILD_ARMY = 3
+BUILD_CITY = 4
+MOVE_ARMY = 5
+SAIL_ARMY = 6
+DESTROY_ARMY = 7
+JOKER_ASSIGNMENT = 8
+END_GAME = 9
+
+PHASE_CODES = {
+    Phases.PickCard: PICK_CARD,
+    Phases.PickAbilityAND: PICK_ABILITY_AND,
+    Phases.PickAbilityOR: PICK_ABILITY_OR,
+    Phases.BuildArmy: BUILD_ARMY,
+    Phases.BuildCity: BUILD_CITY,
+    Phases.MoveArmy: MOVE_ARMY,
+    Phases.SailArmy: SAIL_ARMY,
+    Phases.DestroyArmy: DESTROY_ARMY,
+    Phases.JokerAssignment: JOKER_ASSIGNMENT,
+    Phases.EndGame: END_GAME
+}
+
+ABILITY_PHASES = [(BuildArmies, BUILD_ARMY), (BuildCities, BUILD_CITY), (MoveArmies, MOVE_ARMY), (DestroyArmies, DESTROY_ARMY), (SailArmies, SAIL_ARMY)]
+
+#Board and deck data as arrays, built once per game setup and reused for every batch
+class BatchTables:
+    def __init__(self, game):
+        board = game.board
+        deck = game.deck
+        self.board = board
+        self.deck = deck
+        tile_count = len(board.tile_list)
+        self.starting = np.array([tile.is_starting_tile for tile in board.tile_list])
+        self.continent = np.zeros((tile_count, len(board.continent_list)), dtype=np.int32)
+        for tile in board.tile_list:
+            if tile.continent is not None:
+                self.continent[tile.index, tile.continent.index] = 1
+        #Move and sail targets of every tile as MovingOptions lists them, duplicates included
+        self.land_steps, self.land_step_count = self.step_table(board, False)
+        self.sail_steps, self.sail_step_count = self.step_table(board, True)
+
+        goods = list(deck.goods.values())
+        self.goods_count = len(goods)
+        self.goods_thresholds = np.array([[good.score1, good.score2, good.score3, good.score5] for good in goods])
+        self.threshold_points = np.array([1, 1, 1, 2])
+
+        self.abilities = []
+        for card in deck.cards:
+            for ability in card.abilities:
+                if ability not in self.abilities:
+                    self.abilities.append(ability)
+        self.ability_manuevers = np.array([ability.manuevers for ability in self.abilities])
+        self.ability_phase = np.array([self.ability_phase_code(ability) for ability in self.abilities])
+        self.max_abilities = max(len(card.abilities) for card in deck.cards)
+        self.card_good = np.array([deck.joker_index if card.good == "Joker" else deck.goods[card.good].index for card in deck.cards])
+        self.card_quantity = np.array([card.quantity for card in deck.cards])
+        self.card_isor = np.array([card.isor for card in deck.cards])
+        self.card_ability_count = np.array([len(card.abilities) for card in deck.cards])
+        self.card_abilities = np.full((len(deck.cards), self.max_abilities), -1)
+        for card in deck.cards:
+            for ability_position, ability in enumerate(card.abilities):
+                self.card_abilities[card.index, ability_position] = self.abilities.index(ability)
+
+    def step_table(self, board, sail):
+        steps = board.move_targets(sail)
+        table = np.zeros((len(steps), max(1, max(len(tile_steps) for tile_steps in steps))), dtype=np.int64)
+        for tile_index, tile_steps in enumerate(steps):
+            table[tile_index, :len(tile_steps)] = tile_steps
+        return table, np.array([len(tile_steps) for tile_steps in steps])
+
+    def ability_phase_code(self, ability):
+        for ability_class, phase in ABILITY_PHASES:
+            if isinstance(ability, ability_class):
+                return phase
+
+#Plays many random playouts from one game state at once - every game is a row of the arrays and all rows make their move together
+#The moves are picked with the same probabilities as AI_manager.random_playout picks from create_options
+class BatchRollout:
+    def __init__(self, game, batch_size, rng, tables=None):
+        state = game.state
+        self.tables = tables if tables is not None else BatchTables(game)
+        self.rng = rng
+        self.size = batch_size
+        self.player_count = state.player_count
+        self.max_turns = game.max_turns
+        self.max_armies = game.max_armies
+        self.max_cities = game.max_cities
+        self.joker_index = game.deck.joker_index
+        tile_count = len(game.board.tile_list)
+        #Armies and cities are games x players x tiles, so the tiles of one player are a contiguous row
+        self.armies = np.tile(np.array(state.armies, dtype=np.int32).reshape(tile_count, self.player_count).T, (batch_size, 1, 1))
+        if state.active_tile is not None:
+            #Armies picked up for an unfinished move are put back, as at the end of the move
+            self.armies[:, state.active_player, state.active_tile] += state.selected_armies
+        self.cities = np.tile(np.array(state.cities, dtype=np.int32).reshape(tile_count, self.player_count).T, (batch_size, 1, 1))
+        self.goods = np.tile(np.array(state.goods, dtype=np.int32).reshape(self.player_count, state.goods_count), (batch_size, 1, 1))
+        self.coins = np.tile(np.array(state.coins, dtype=np.int32), (batch_size, 1))
+        self.hand_size = max(6, len(state.active_cards)) + 1
+        active_cards = np.full(self.hand_size, -1)
+        active_cards[:len(state.active_cards)] = state.active_cards
+        self.active_cards = np.tile(active_cards, (batch_size, 1))
+        self.active_card_count = np.full(batch_size, len(state.active_cards))
+        deck = np.zeros(len(game.deck.cards), dtype=bool)
+        deck[state.deck_cards] = True
+        self.deck = np.tile(deck, (batch_size, 1))
+        viable = np.full(max(self.tables.max_abilities, len(state.viable_abilities)), -1)
+        for ability_position, ability in enumerate(state.viable_abilities):
+            viable[ability_position] = self.tables.abilities.index(ability)
+        self.viable = np.tile(viable, (batch_size, 1))
+        self.viable_count = np.full(batch_size, len(state.viable_abilities))
+        self.phase = np.full(batch_size, PHASE_CODES[state.phase])
+        self.active_player = np.full(batch_size, state.active_player)
+        self.turn = np.full(batch_size, state.turn)
+        self.manuevers = np.full(batch_size, state.manuevers)
+        self.steps = 0
+
+    def run(self):
+        #Winners of every playout as a batch_size x players mask
+        handlers = [self.pick_card, self.pick_ability_and, self.pick_ability_or, self.build_army, self.build_city,
+                    self.move_army, self.sail_army, self.destroy_army, self.assign_joker]
+        while True:
+            end_moves = []
+            for phase, handler in enumerate(handlers):
+                games = np.nonzero(self.phase == phase)[0]
+                if len(games) > 0:
+                    end_moves.append((games, handler))
+            if not end_moves:
+                break
+            #Every group is picked before any game moves, so each game makes exactly one move per step
+            self.end_move(np.concatenate([handler(games) for games, handler in end_moves]))
+            self.steps += 1
+        return self.winners()
+
+    def choose(self, options):
+        #Uniformly random True column of every row, -1 for rows without any
+        keys = self.rng.random(options.shape)
+        keys[~options] = -1
+        choice = keys.argmax(axis=1)
+        choice[~options.any(axis=1)] = -1
+        return choice
+
+    def set_ability(self, games, abilities):
+        self.manuevers[games] = self.tables.ability_manuevers[abilities]
+        self.phase[games] = self.tables.ability_phase[abilities]
+
+    def pick_card(self, games):
+        positions = np.arange(self.hand_size)
+        cost = (positions + 1) // 2
+        players = self.active_player[games]
+        affordable = (positions < self.active_card_count[games, None]) & (cost <= self.coins[games, players][:, None])
+        choice = self.choose(affordable)
+        #A hand without a playable card cannot go on, the game is scored as it is
+        stuck = choice < 0
+        self.phase[games[stuck]] = END_GAME
+        games, players, choice = games[~stuck], players[~stuck], choice[~stuck]
+        cards = self.active_cards[games, choice]
+        self.coins[games, players] -= cost[choice]
+        self.goods[games, players, self.tables.card_good[cards]] += self.tables.card_quantity[cards]
+        several = self.tables.card_ability_count[cards] > 1
+        several_games = games[several]
+        self.phase[several_games] = np.where(self.tables.card_isor[cards[several]], PICK_ABILITY_OR, PICK_ABILITY_AND)
+        self.viable[several_games] = -1
+        self.viable[several_games, :self.tables.max_abilities] = self.tables.card_abilities[cards[several]]
+        self.viable_count[several_games] = self.tables.card_ability_count[cards[several]]
+        self.set_ability(games[~several], self.tables.card_abilities[cards[~several], 0])
+        #Cards after the played one move one position forward
+        source = positions + (positions >= choice[:, None])
+        source[source >= self.hand_size] = self.hand_size - 1
+        hand = self.active_cards[games]
+        hand[:, -1] = -1
+        self.active_cards[games] = np.take_along_axis(hand, source, axis=1)
+        self.active_card_count[games] -= 1
+        return games[:0]
+
+    def pick_ability_and(self, games):
+        return self.pick_ability(games, True)
+
+    def pick_ability_or(self, games):
+        return self.pick_ability(games, False)
+
+    def pick_ability(self, games, keep_rest):
+        positions = np.arange(self.viable.shape[1])
+        choice = self.choose(positions < self.viable_count[games, None])
+        abilities = self.viable[games, choice]
+        self.set_ability(games, abilities)
+        if keep_rest:
+            source = positions + (positions >= choice[:, None])
+            source[source >= len(positions)] = len(positions) - 1
+            viable = self.viable[games]
+            self.viable[games] = np.take_along_axis(viable, source, axis=1)
+            self.viable[games, -1] = -1
+            self.viable_count[games] -= 1
+        else:
+            self.viable[games] = -1
+            self.viable_count[games] = 0
+        return games[:0]
+
+    def build_army(self, games):
+        players = self.active_player[games]
+        can_build = (self.manuevers[games] > 0) & (self.armies[games, players].sum(axis=1) < self.max_armies)
+        options = (self.cities[games, players] > 0) | self.tables.starting
+        options &= can_build[:, None]
+        tiles = self.choose(options)
+        build = tiles >= 0
+        self.armies[games[build], players[build], tiles[build]] += 1
+        self.manuevers[games[build]] -= 1
+        return games[~build]
+
+    def build_city(self, games):
+        players = self.active_player[games]
+        can_build = (self.manuevers[games] > 0) & (self.cities[games, players].sum(axis=1) < self.max_cities)
+        options = (self.armies[games, players] > 0) & can_build[:, None]
+        tiles = self.choose(options)
+        build = tiles >= 0
+        self.cities[games[build], players[build], tiles[build]] += 1
+        self.manuevers[games[build]] -= 1
+        return games[~build]
+
+    def move_army(self, games):
+        return self.move_or_sail_army(games, self.tables.land_steps, self.tables.land_step_count)
+
+    def sail_army(self, games):
+        return self.move_or_sail_army(games, self.tables.sail_steps, self.tables.sail_step_count)
+
+    def move_or_sail_army(self, games, steps, step_count):
+        #Every [tile, target] pair is one option and ending the move is one more, so tiles are weighted by their number of targets
+        players = self.active_player[games]
+        weights = (self.armies[games, players] > 0) * step_count
+        weights[self.manuevers[games] <= 0] = 0
+        bounds = weights.cumsum(axis=1)
+        total = bounds[:, -1] + 1
+        picks = (self.rng.random(len(games)) * total).astype(np.int64)
+        move = (picks < total - 1) & (self.manuevers[games] > 0)
+        ended = games[~move]
+        games, players, picks, bounds, weights = games[move], players[move], picks[move], bounds[move], weights[move]
+        rows = np.arange(len(games))
+        tiles = (bounds <= picks[:, None]).sum(axis=1)
+        offsets = picks - (bounds[rows, tiles] - weights[rows, tiles])
+        targets = steps[tiles, offsets]
+        self.armies[games, players, tiles] -= 1
+        self.armies[games, players, targets] += 1
+        self.manuevers[games] -= 1
+        return ended
+
+    def destroy_army(self, games):
+        #Options are every army of another player plus ending the move
+        players = self.active_player[games]
+        targets = self.armies[games] > 0
+        targets[np.arange(len(games)), players] = False
+        targets &= (self.manuevers[games] > 0)[:, None, None]
+        options = np.concatenate([targets.reshape(len(games), -1), np.ones((len(games), 1), dtype=bool)], axis=1)
+        choice = self.choose(options)
+        destroy = choice < options.shape[1] - 1
+        target_players, tiles = np.divmod(choice[destroy], self.armies.shape[2])
+        self.armies[games[destroy], target_players, tiles] -= 1
+        self.manuevers[games[destroy]] -= 1
+        return games[~destroy]
+
+    def assign_joker(self, games):
+        assign = self.manuevers[games] > 0
+        assigned = games[assign]
+        goods = self.rng.integers(self.tables.goods_count, size=len(assigned))
+        self.goods[assigned, self.active_player[assigned], goods] += 1
+        self.manuevers[assigned] -= 1
+        return games[~assign]
+
+    def next_player(self, games):
+        self.active_player[games] = (self.active_player[games] + 1) % self.player_count
+
+    def joker_count(self, games):
+        return self.goods[games, self.active_player[games], self.joker_index]
+
+    def draw_card(self, games):
+        choice = self.choose(self.deck[games])
+        draw = choice >= 0
+        games, choice = games[draw], choice[draw]
+        self.deck[games, choice] = False
+        self.active_cards[games, self.active_card_count[games]] = choice
+        self.active_card_count[games] += 1
+
+    def end_move(self, games):
+        #Same rules as Game.end_move_handler
+        joker = self.phase[games] == JOKER_ASSIGNMENT
+        joker_games = games[joker]
+        self.next_player(joker_games)
+        finished = self.active_player[joker_games] == 0
+        self.phase[joker_games[finished]] = END_GAME
+        self.manuevers[joker_games[~finished]] = self.joker_count(joker_games[~finished])
+
+        games = games[~joker & (self.phase[games] != PICK_CARD)]
+        self.manuevers[games] = 0
+        picking = (self.phase[games] == PICK_ABILITY_OR) | (self.phase[games] == PICK_ABILITY_AND)
+        self.viable[games[picking]] = -1
+        self.viable_count[games[picking]] = 0
+        has_viable = self.viable_count[games] > 0
+        self.phase[games[has_viable]] = PICK_ABILITY_AND
+        next_games = games[~has_viable]
+        self.phase[next_games] = PICK_CARD
+        self.next_player(next_games)
+        self.draw_card(next_games)
+        new_turn = games[self.active_player[games] == 0]
+        self.turn[new_turn] += 1
+        last_turn = new_turn[self.turn[new_turn] > self.max_turns]
+        self.manuevers[last_turn] = self.joker_count(last_turn)
+        self.phase[last_turn] = JOKER_ASSIGNMENT
+
+    def controllers(self, armies_and_cities):
+        #Same as Game.score_tile_or_continent - the player with strictly the most, -1 for a tie
+        most = armies_and_cities.max(axis=1, keepdims=True)
+        unique = (armies_and_cities == most).sum(axis=1) == 1
+        return np.where(unique, armies_and_cities.argmax(axis=1), -1)
+
+    def winners(self):
+        #Same rules as scoring_handler and endgame_handler
+        players = np.arange(self.player_count)
+        armies_and_cities = self.armies + self.cities
+        tile_control = self.controllers(armies_and_cities)
+        continent_control = self.controllers(armies_and_cities @ self.tables.continent)
+        tiles_controlled = (tile_control[:, :, None] == players).sum(axis=1)
+        score = tiles_controlled + (continent_control[:, :, None] == players).sum(axis=1)
+        goods = self.goods[:, :, :self.tables.goods_count, None]
+        score += ((goods >= self.tables.goods_thresholds) * self.tables.threshold_points).sum(axis=(2, 3))
+        winners = np.ones((self.size, self.player_count), dtype=bool)
+        for value in (score, self.coins, tiles_controlled, self.armies.sum(axis=2)):
+            best = np.where(winners, value, np.iinfo(np.int64).min).max(axis=1, keepdims=True)
+            winners &= value == best
+        self.score = score
+        return winners
+
+    def result_weight(self, winners, player_index):
+        #Sum of AI_manager.result_weight over the batch - 3 for a win, 1 for a shared win
+        won = winners[:, player_index]
+        shared = winners.sum(axis=1) > 1
+        return int(3 * (won & ~shared).sum() + (won & shared).sum())
@@ -0,0 +1,141 @@
+import argparse
+import json
+import platform
+import random
+import time
+from game import Phases
+from ai_manager import AI_manager, UCT_manager
+from game_setup import board_layout, create_game, generate_layout
+
+#Every result is seconds per call, the best of the repeats
+def measure(function, number, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        seconds = (time.perf_counter() - start) / number
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+#Random games tried for the rare phases, before the phases still missing are reported
+PHASE_GAMES = 50
+
+def has_options(state):
+    #Card and ability picks always have options, the other phases only while maneuvers are left
+    return state.phase in (Phases.PickCard, Phases.PickAbilityAND, Phases.PickAbilityOR) or state.manuevers > 0
+
+def phase_states(game, seed):
+    #First state of every phase with something to do, from random games on the seed and the seeds after it
+    states = {}
+    ai = AI_manager(0, seed=seed)
+    finished = None
+    phases = [phase for phase in Phases if phase != Phases.EndGame]
+    for game_index in range(PHASE_GAMES):
+        sim = game.clone_game(random.Random(seed + game_index))
+        while sim.state.phase != Phases.EndGame:
+            if sim.state.phase not in states and has_options(sim.state):
+                states[sim.state.phase] = sim.clone_game()
+            sim.apply_move(ai.pick_random_instruction(ai.create_options(sim), sim.rng))
+        if finished is None:
+            finished = sim
+        if all(phase in states for phase in phases):
+            break
+    missing = [phase.name for phase in phases if phase not in states]
+    if missing:
+        print(f"No state with options in {PHASE_GAMES} games for: {', '.join(missing)}")
+    return states, finished
+
+def benchmark_board(name, layout, seed, number, repeat, sim_length):
+    game = create_game(None, layout, seed)
+    ai = AI_manager(0, seed=seed)
+    results = {}
+    results["clone_game"] = measure(game.clone_game, number, repeat)
+
+    states, finished = phase_states(game, seed)
+    for phase, state_game in sorted(states.items(), key=lambda item: item[0].value):
+        results[f"create_options.{phase.name}"] = measure(lambda: ai.create_options(state_game), number, repeat)
+
+    playouts = max(1, number // 100)
+    sim = game.clone_game()
+    checkpoint = sim.checkpoint()
+    ai.stats.rollouts = ai.stats.rollout_moves = 0
+    def playout():
+        ai.random_playout(sim)
+        sim.rollback(checkpoint)
+    results["random_playout"] = measure(playout, playouts, repeat)
+    playout_moves = ai.stats.rollout_moves / ai.stats.rollouts
+
+    results["scoring_handler"] = measure(finished.scoring_handler, number, repeat)
+
+    #movable_tiles and sailable_tiles work out the move cost of the armies picked up for a move
+    state = finished.clone_game().state
+    state.selected_armies = 1
+    army_tiles = [finished.board.tile_list[tile_index] for tile_index in sorted(set().union(*state.army_tiles))]
+    results["movable_tiles"] = measure(lambda: [game.tilemanager.movable_tiles(state, tile, 3) for tile in army_tiles], number, repeat) / len(army_tiles)
+    results["sailable_tiles"] = measure(lambda: [game.tilemanager.sailable_tiles(state, tile, 3) for tile in army_tiles], number, repeat) / len(army_tiles)
+
+    #One decision from the first card pick, a fresh seeded AI every time
+    for kind, manager in (("flat", AI_manager), ("uct", UCT_manager)):
+        def decision():
+            manager(sim_length, seed=seed).AI_loop(game.clone_game())
+        results[f"ai_decision.{kind}"] = measure(decision, 1, repeat)
+    return {
+        "board": name,
+        "tiles": len(game.board.tile_list),
+        "playout_moves": playout_moves,
+        "results": results
+    }
+
+def compare(results, baseline):
+    #Ratio of every result to the same result of the baseline file, above 1 is slower
+    for setting in ("seed", "number", "repeat", "sim_length"):
+        if baseline.get(setting) != results[setting]:
+            print(f"Baseline was run with {setting} {baseline.get(setting)}, not {results[setting]}")
+    baseline_boards = {board["board"]: board["results"] for board in baseline["boards"]}
+    for board in results["boards"]:
+        old = baseline_boards.get(board["board"])
+        if old is None:
+            continue
+        for key, seconds in board["results"].items():
+            if old.get(key):
+                print(f"{board['board']} {key}: {seconds / old[key]:.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the engine primitives and AI decisions on fixed seeds")
+    parser.add_argument("--size", type=int, action="append", dest="sizes", help="generated board width and height, can be repeated")
+    parser.add_argument("--water", type=float, default=0.4, help="share of water tiles on generated boards")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--number", type=int, default=1000, help="calls per repeat of the fast primitives")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sim-length", type=int, default=50, help="playouts of the AI decisions")
+    parser.add_argument("--output", help="json file for the results")
+    parser.add_argument("--baseline", help="json file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    boards = [("default", board_layout)]
+    for size in args.sizes if args.sizes is not None else [12, 24]:
+        boards.append((f"{size}x{size}", generate_layout(size, size, args.water, seed=args.seed)))
+    results = {
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "number": args.number,
+        "repeat": args.repeat,
+        "sim_length": args.sim_length,
+        "boards": []
+    }
+    for name, layout in boards:
+        board = benchmark_board(name, layout, args.seed, args.number, args.repeat, args.sim_length)
+        results["boards"].append(board)
+        print(f"{name}: {board['tiles']} tiles, {board['playout_moves']:.0f} moves per playout")
+        for key, seconds in board["results"].items():
+            print(f"{name} {key}: {seconds * 1000:.3f}ms")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import json
+import random
+import time
+from game import Board
+from game_setup import create_game, generate_layout
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def benchmark_board(size, sources, water, seed):
+    layout = generate_layout(size, size, water, seed=seed)
+    board, build_seconds = timed(Board, layout)
+    rng = random.Random(seed)
+    ground_tiles = [tile for tile in board.tile_list if tile.tile_type == "ground"]
+    source_tiles = rng.sample(ground_tiles, min(sources, len(ground_tiles)))
+    start = time.perf_counter()
+    for tile in source_tiles:
+        board.land_distances(tile.index)
+        board.sail_distances(tile.index)
+    distance_seconds = time.perf_counter() - start
+    game, setup_seconds = timed(create_game, None, layout)
+    clone, clone_seconds = timed(game.clone_game)
+    return {
+        "size": size,
+        "tiles": len(board.tile_list),
+        "continents": len(board.continent_list),
+        "largest_continent": max(len(continent.tiles) for continent in board.continent_list),
+        "board_seconds": build_seconds,
+        "distance_seconds_per_source": distance_seconds / len(source_tiles),
+        "game_setup_seconds": setup_seconds,
+        "clone_seconds": clone_seconds
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Times board construction and traversals on generated boards")
+    parser.add_argument("--size", type=int, action="append", dest="sizes", help="board width and height, can be repeated")
+    parser.add_argument("--sources", type=int, default=20, help="tiles to compute distance tables from")
+    parser.add_argument("--water", type=float, default=0.4, help="share of water tiles")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="json file for the results")
+    args = parser.parse_args()
+    results = []
+    for size in args.sizes or [100, 200]:
+        result = benchmark_board(size, args.sources, args.water, args.seed)
+        results.append(result)
+        print(f"{result['size']}x{result['size']}: board {result['board_seconds']:.3f}s, distances {result['distance_seconds_per_source'] * 1000:.1f}ms/source, "
+              f"setup {result['game_setup_seconds']:.3f}s, clone {result['clone_seconds'] * 1000:.2f}ms, largest continent {result['largest_continent']} tiles")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main()
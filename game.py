@@ -0,0 +1,1039 @@
+import random
+import logging
+from enum import Enum
+import math
+import copy
+import operator
+from array import array
+from collections import deque
+from bisect import bisect
+
+logger = logging.getLogger(__name__)
+
+def debug_check(game_object, context):
+    print(f"Debug Check in {context}:")
+    for player_index, player in enumerate(game_object.players):
+        print(f"Player {player} armies: {game_object.state.player_armies[player_index]}")
+    game_object.display_tile_info()
+
+
+#Moves are packed into one int - kind, source index and target index, 24 bits each for the indices
+MOVE_INDEX_BITS = 24
+MOVE_INDEX_MASK = (1 << MOVE_INDEX_BITS) - 1
+MOVE_END = 0
+MOVE_CARD = 1
+MOVE_ABILITY = 2
+MOVE_BUILD_ARMY = 3
+MOVE_BUILD_CITY = 4
+MOVE_ARMY = 5
+MOVE_DESTROY = 6
+MOVE_JOKER = 7
+
+def encode_move(kind, source=0, target=0):
+    return kind << 48 | source << 24 | target
+
+def move_kind(move):
+    return move >> 48
+
+def move_source(move):
+    return move >> 24 & MOVE_INDEX_MASK
+
+def move_target(move):
+    return move & MOVE_INDEX_MASK
+
+class Phases(Enum):
+    PickCard = 1
+    PickAbilityAND = 2
+    PickAbilityOR = 3
+    BuildArmy = 4
+    BuildCity = 5
+    MoveArmy = 6
+    DestroyArmy = 7
+    SailArmy = 8
+    JokerAssignment = 9
+    EndGame = 10
+
+class Deck:
+    def __init__(self, goods, default_deck, bonus_deck):
+        self.goods = goods
+        self.default_deck = default_deck
+        self.bonus_deck = bonus_deck
+        self.cards = default_deck + bonus_deck
+        for good_index, good in enumerate(self.goods.values()):
+            good.index = good_index
+        self.joker_index = len(self.goods)
+        self.good_list = list(self.goods.values())
+        self.abilities = []
+        for card_index, card in enumerate(self.cards):
+            card.index = card_index
+            for ability in card.abilities:
+                if ability not in self.abilities:
+                    ability.index = len(self.abilities)
+                    self.abilities.append(ability)
+
+class Good:
+    def __init__(self, name, score):
+        self.name = name
+        self.index = None
+        self.score1 = score[0]
+        self.score2 = score[1]
+        self.score3 = score[2]
+        self.score5 = score[3]
+
+
+class Card:
+    def __init__(self, abilities, good, quantity, isor):
+        self.abilities = abilities
+        self.good = good
+        self.quantity = quantity
+        self.isor = isor
+        self.index = None
+
+class Ability:
+    def __init__(self, manuevers):
+        self.manuevers = manuevers
+        self.index = None
+
+class BuildArmies(Ability):
+    def __init__(self, manuevers):
+        super().__init__(manuevers)
+        self.ability_description = "Build Armies(" + str(self.manuevers) + ")"
+
+class BuildCities(Ability):
+    def __init__(self, manuevers):
+        super().__init__(manuevers)
+        self.ability_description = "Build Cities(" + str(self.manuevers) + ")"
+
+class MoveArmies(Ability):
+    def __init__(self, manuevers):
+        super().__init__(manuevers)
+        self.ability_description = "Move Armies(" + str(self.manuevers) + ")"
+
+class DestroyArmies(Ability):
+    def __init__(self, manuevers):
+        super().__init__(manuevers)
+        self.ability_description = "Destroy Armies(" + str(self.manuevers) + ")"
+
+class SailArmies(Ability):
+    def __init__(self, manuevers):
+        super().__init__(manuevers)
+        self.ability_description = "Sail Armies(" + str(self.manuevers) + ")"
+
+class Continent:
+    def __init__(self, continent_id, index, board):
+        self.continent_id = continent_id
+        self.index = index
+        self.board = board
+        self.tiles = []
+
+    def add_tile(self, tile):
+        self.tiles.append(tile)
+        tile.continent = self
+
+    def __reduce__(self):
+        return (board_continent, (self.board, self.index))
+
+#Tiles only hold static data, armies and cities of a tile are stored in GameState
+class Tile:
+    def __init__(self, tile_x, tile_y, tile_type, index, board):
+        self.tile_x = tile_x
+        self.tile_y = tile_y
+        self.index = index
+        self.board = board
+        self.tile_id = f"T{self.tile_x}_{self.tile_y}"
+        self.continent = None
+        self.tile_type = tile_type
+        self.neighbours = []
+        self.is_starting_tile = False
+
+    def __reduce__(self):
+        return (board_tile, (self.board, self.index))
+
+    def make_starting_tile(self):
+        self.is_starting_tile = True
+
+    def add_neighbour(self, neighbour):
+        if neighbour not in self.neighbours:
+            self.neighbours.append(neighbour)
+            neighbour.neighbours.append(self)
+
+#Board - static data shared by a game and all of its clones
+class Board:
+    def __init__(self, layout):
+        self.layout = layout
+        self.tiles = []
+        self.tile_list = []
+        self.continents = {}
+        self.continent_list = []
+        self.starting_tiles = []
+        #Shortest path distances from a tile, filled in the first time the tile is used as a source
+        self.land_distance_table = {}
+        self.sail_distance_table = {}
+        self.step_table = {}
+        self.move_target_table = {}
+        self.create_tiles()
+        #Tile indices have to fit the source and target of an encoded move
+        if len(self.tile_list) > MOVE_INDEX_MASK + 1:
+            raise ValueError(f"Board of {len(self.tile_list)} tiles is too large, moves can only address {MOVE_INDEX_MASK + 1}")
+        self.add_neighbors(self.tiles)
+
+        continent_counter = 0
+        for tile in self.tile_list:
+            continent_counter = self.assign_to_continent(tile, continent_counter)
+
+    def __reduce__(self):
+        #Pickled boards are rebuilt from the layout instead of walking the neighbour graph
+        return (get_board, (self.layout,))
+
+    def create_tiles(self):
+        for row_index, row in enumerate(self.layout):
+            tile_row = []
+            for col_index, col in enumerate(row):
+                tile_type = 'water' if col == 'W' else 'ground'
+                tile = Tile(row_index, col_index, tile_type, len(self.tile_list), self)
+                if col == 'S':
+                    tile.make_starting_tile()
+                    self.starting_tiles.append(tile)
+                tile_row.append(tile)
+                self.tile_list.append(tile)
+            self.tiles.append(tile_row)
+
+    def add_neighbors(self, tiles):
+        for i in range(len(tiles)):
+            for j in range(len(tiles[i])):
+                tile = tiles[i][j]
+                if i > 0: tile.add_neighbour(tiles[i - 1][j])
+                if i < len(tiles) - 1: tile.add_neighbour(tiles[i + 1][j])
+                if j > 0: tile.add_neighbour(tiles[i][j - 1])
+                if j < len(tiles[i]) - 1: tile.add_neighbour(tiles[i][j + 1])
+
+    def assign_to_continent(self, tile, continent_counter):
+        if tile.tile_type == 'ground' and tile.continent is None:
+            continent_counter += 1
+            continent = Continent(f"C{continent_counter}", len(self.continent_list), self)
+            self.continents[continent.continent_id] = continent
+            self.continent_list.append(continent)
+            self.explore_and_assign(tile, continent)
+        return continent_counter
+
+    def explore_and_assign(self, tile, continent):
+        #Iterative flood fill, large generated boards would hit the recursion limit
+        continent.add_tile(tile)
+        queue = deque([tile])
+        while queue:
+            for neighbour in queue.popleft().neighbours:
+                if neighbour.tile_type == 'ground' and neighbour.continent is None:
+                    continent.add_tile(neighbour)
+                    queue.append(neighbour)
+
+    def land_distances(self, tile_index):
+        if tile_index not in self.land_distance_table:
+            self.land_distance_table[tile_index] = self.distances(tile_index, False)
+        return self.land_distance_table[tile_index]
+
+    def sail_distances(self, tile_index):
+        if tile_index not in self.sail_distance_table:
+            self.sail_distance_table[tile_index] = self.distances(tile_index, True)
+        return self.sail_distance_table[tile_index]
+
+    def distances(self, tile_index, sail):
+        #Breadth first search over ground tiles (-1 = unreachable), when sailing one water tile between two ground tiles counts as a single step
+        steps = self.step_lists(sail)
+        distances = array('i', [-1]) * len(self.tile_list)
+        distances[tile_index] = 0
+        frontier = [tile_index]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                for neighbour_index in steps[index]:
+                    if distances[neighbour_index] == -1:
+                        distances[neighbour_index] = distance
+                        next_frontier.append(neighbour_index)
+            frontier = next_frontier
+        return distances
+
+    def step_lists(self, sail):
+        #Tile indices reachable in one step from every tile, built once per board
+        if sail not in self.step_table:
+            self.step_table[sail] = [sorted(set(self.step_targets(tile, sail))) for tile in self.tile_list]
+        return self.step_table[sail]
+
+    def move_targets(self, sail):
+        #Targets of a one army move or sail from every tile, in neighbour order and with duplicates, as the AI lists them
+        if sail not in self.move_target_table:
+            self.move_target_table[sail] = [list(self.step_targets(tile, sail)) for tile in self.tile_list]
+        return self.move_target_table[sail]
+
+    def step_targets(self, tile, sail):
+        for neighbour in tile.neighbours:
+            if neighbour.tile_type == "ground":
+                yield neighbour.index
+            elif sail:
+                for across in neighbour.neighbours:
+                    if across.tile_type == "ground" and across is not tile:
+                        yield across.index
+
+#Boards are static, so every game on the same layout shares one board and its distance tables
+BOARDS = {}
+
+def get_board(layout):
+    key = tuple(layout)
+    if key not in BOARDS:
+        BOARDS[key] = Board(layout)
+    return BOARDS[key]
+
+def board_tile(board, index):
+    return board.tile_list[index]
+
+def board_continent(board, index):
+    return board.continent_list[index]
+
+#GameState - everything that changes during the game, stored in flat arrays
+#armies/cities are indexed by tile.index * player_count + player_index
+class GameState:
+    def __init__(self, tile_count, continent_count, player_count, goods_count):
+        self.player_count = player_count
+        self.goods_count = goods_count
+        self.armies = array('i', [0]) * (tile_count * player_count)
+        self.cities = array('i', [0]) * (tile_count * player_count)
+        self.move_cost = array('i', [-1]) * tile_count
+        self.continent_armies = array('i', [0]) * (continent_count * player_count)
+        self.continent_cities = array('i', [0]) * (continent_count * player_count)
+        self.player_armies = array('i', [0]) * player_count
+        self.player_cities = array('i', [0]) * player_count
+        self.coins = array('i', [0]) * player_count
+        self.score = array('i', [0]) * player_count
+        #Scoring kept up to date by the Game on every change, -1 means nobody controls the tile/continent
+        self.tile_control = array('i', [-1]) * tile_count
+        self.continent_control = array('i', [-1]) * continent_count
+        self.goods_score = array('i', [0]) * player_count
+        self.goods = array('i', [0]) * (player_count * goods_count)
+        #Sorted tile indices where every player has armies or cities, replaced as a whole when they change
+        self.army_tiles = [()] * player_count
+        self.city_tiles = [()] * player_count
+        self.active_cards = []
+        self.deck_cards = []
+        self.viable_abilities = []
+        self.winners = []
+        self.phase = None
+        self.active_player = 0
+        self.turn = 1
+        self.manuevers = 0
+        self.target_player = None
+        self.active_tile = None
+        self.selected_armies = 0
+        #Zobrist hash of the position, kept up to date by the Game together with the fields it covers
+        self.hash = 0
+        #List of (container, key, old value) - an array and index or the state __dict__ and attribute name, None when changes are not recorded
+        self.undo_log = None
+
+    def copy(self):
+        new_state = copy.copy(self)
+        new_state.undo_log = None
+        new_state.armies = self.armies[:]
+        new_state.cities = self.cities[:]
+        new_state.move_cost = self.move_cost[:]
+        new_state.continent_armies = self.continent_armies[:]
+        new_state.continent_cities = self.continent_cities[:]
+        new_state.player_armies = self.player_armies[:]
+        new_state.player_cities = self.player_cities[:]
+        new_state.coins = self.coins[:]
+        new_state.score = self.score[:]
+        new_state.tile_control = self.tile_control[:]
+        new_state.continent_control = self.continent_control[:]
+        new_state.goods_score = self.goods_score[:]
+        new_state.goods = self.goods[:]
+        new_state.army_tiles = self.army_tiles[:]
+        new_state.city_tiles = self.city_tiles[:]
+        new_state.active_cards = self.active_cards[:]
+        new_state.deck_cards = self.deck_cards[:]
+        new_state.viable_abilities = self.viable_abilities[:]
+        new_state.winners = self.winners[:]
+        return new_state
+
+    def tile_armies(self, tile_index):
+        return self.armies[tile_index * self.player_count:(tile_index + 1) * self.player_count]
+
+    def tile_cities(self, tile_index):
+        return self.cities[tile_index * self.player_count:(tile_index + 1) * self.player_count]
+
+    def player_goods(self, player_index):
+        return self.goods[player_index * self.goods_count:(player_index + 1) * self.goods_count]
+
+    def key(self):
+        #Used to check that two states are the same position
+        return (self.armies.tobytes(), self.cities.tobytes(), self.goods.tobytes(), self.coins.tobytes(), self.move_cost.tobytes(),
+                tuple(self.active_cards), tuple(self.deck_cards), tuple(map(id, self.viable_abilities)),
+                self.phase, self.active_player, self.turn, self.manuevers, self.target_player, self.active_tile, self.selected_armies)
+
+    def is_clickable(self, tile_index):
+        return self.move_cost[tile_index] != -1
+
+    #During the game the state is only changed through set, set_item and add_item, so the changes can be undone
+    #Lists are never changed in place, they are replaced by a changed copy
+    def set(self, name, value):
+        fields = self.__dict__
+        if self.undo_log is not None:
+            self.undo_log.append((fields, name, fields[name]))
+        fields[name] = value
+
+    def set_item(self, values, index, value):
+        if self.undo_log is not None:
+            self.undo_log.append((values, index, values[index]))
+        values[index] = value
+
+    def add_item(self, values, index, number):
+        self.set_item(values, index, values[index] + number)
+
+    def checkpoint(self):
+        if self.undo_log is None:
+            self.undo_log = []
+        return len(self.undo_log)
+
+    def rollback(self, checkpoint):
+        undo_log = self.undo_log
+        for target, key, value in reversed(undo_log[checkpoint:]):
+            target[key] = value
+        del undo_log[checkpoint:]
+
+ZOBRIST_MASK = (1 << 64) - 1
+
+def zobrist_mix(base, value):
+    #splitmix64 finalizer, gives a different pseudo random key for every value of the same base
+    key = (base + value * 0x9E3779B97F4A7C15) & ZOBRIST_MASK
+    key = ((key ^ (key >> 30)) * 0xBF58476D1CE4E5B9) & ZOBRIST_MASK
+    key = ((key ^ (key >> 27)) * 0x94D049BB133111EB) & ZOBRIST_MASK
+    return key ^ (key >> 31)
+
+#Zobrist hashing - the hash of a state is the xor of a key for every value in it, so a change xors out the key of the old value and xors in the new one
+#Keys are mixed from a random base per field and index, counts of any size do not need a table of their own
+#Selected armies of an unfinished move are not covered, the AI never leaves a move half done
+class Zobrist:
+    COUNTS = ("armies", "cities", "goods", "coins")
+    FIELDS = ("active_cards", "deck_cards", "viable_abilities", "phase", "active_player", "turn", "manuevers", "target_player")
+
+    def __init__(self, tile_count, player_count, goods_count, deck, seed=0):
+        generator = random.Random(seed)
+        def bases(count):
+            return [generator.getrandbits(64) for _ in range(count)]
+        self.counts = {
+            "armies": bases(tile_count * player_count),
+            "cities": bases(tile_count * player_count),
+            "goods": bases(player_count * goods_count),
+            "coins": bases(player_count),
+            "active_cards": bases(len(deck.cards)),
+            "deck_cards": bases(len(deck.cards)),
+            "viable_abilities": bases(len(deck.abilities))
+        }
+        self.fields = dict(zip(self.FIELDS, bases(len(self.FIELDS))))
+        #Mixed keys are remembered, a game only ever sees a few values of every field
+        self.keys = {}
+
+    def count_key(self, name, index, value):
+        if value == 0:
+            return 0
+        key = self.keys.get((name, index, value))
+        if key is None:
+            key = self.keys[(name, index, value)] = zobrist_mix(self.counts[name][index], value)
+        return key
+
+    def field_key(self, name, value):
+        if value.__class__ is list:
+            key = 0
+            if name == "deck_cards":
+                for card_index in value:
+                    key ^= self.count_key(name, card_index, 1)
+                return key
+            if name == "viable_abilities":
+                value = [ability.index for ability in value]
+            #Position matters, it sets the price of an active card
+            for position, index in enumerate(value):
+                key ^= self.count_key(name, index, position + 1)
+            return key
+        key = self.keys.get((name, value))
+        if key is None:
+            key = self.keys[(name, value)] = 0 if value is None else zobrist_mix(self.fields[name], (value.value if isinstance(value, Phases) else value) + 1)
+        return key
+
+    def full_hash(self, state):
+        key = 0
+        for name in self.COUNTS:
+            for index, value in enumerate(getattr(state, name)):
+                key ^= self.count_key(name, index, value)
+        for name in self.FIELDS:
+            key ^= self.field_key(name, getattr(state, name))
+        return key
+
+#Keys only depend on the sizes, games of the same size share one Zobrist and its remembered keys
+ZOBRISTS = {}
+
+def get_zobrist(tile_count, player_count, goods_count, deck):
+    key = (tile_count, player_count, goods_count, len(deck.cards), len(deck.abilities))
+    if key not in ZOBRISTS:
+        ZOBRISTS[key] = Zobrist(tile_count, player_count, goods_count, deck)
+    return ZOBRISTS[key]
+
+#Tile manager
+class TileManager:
+    def set_active_tile(self, state, target_tile):
+        state.set("active_tile", target_tile)
+
+    def set_selected_armies(self, state, number):
+        state.set("selected_armies", number)
+
+    def count_armies(self, state, player_index):
+        return sum(state.armies[player_index::state.player_count])
+
+    def continent_army_count(self, state, player_index, continent):
+        armycount = 0
+        for tile in continent.tiles:
+            armycount += state.armies[tile.index * state.player_count + player_index]
+        return armycount
+
+    def count_cities(self, state, player_index):
+        return sum(state.cities[player_index::state.player_count])
+
+    def continent_city_count(self, state, player_index, continent):
+        citycount = 0
+        for tile in continent.tiles:
+            citycount += state.cities[tile.index * state.player_count + player_index]
+        return citycount
+
+    def movable_tiles(self, state, target_tile, manuevers):
+        self.reachable_tiles(state, target_tile.board.land_distances(target_tile.index), manuevers)
+
+    def sailable_tiles(self, state, target_tile, manuevers):
+        self.reachable_tiles(state, target_tile.board.sail_distances(target_tile.index), manuevers)
+
+    def reachable_tiles(self, state, distances, manuevers):
+        #Every step costs one manuever per selected army
+        max_distance = manuevers // state.selected_armies
+        state.set("move_cost", array('i', [distance * state.selected_armies if 0 <= distance <= max_distance else -1 for distance in distances]))
+
+    def reset_movable_tiles(self, state):
+        state.set("move_cost", array('i', [-1]) * len(state.move_cost))
+
+#Player
+class Player:
+    def __init__(self, name, AI, color):
+        self.name = name
+        self.AI = AI
+        self.color = color
+
+#Game
+class Game:
+    def __init__(self, deck, layout, players, tilemanager, starting_armies, max_armies, max_cities, seed=None):
+        self.max_armies = max_armies
+        self.max_cities = max_cities
+        self.players = players
+        self.board = None
+        self.tiles = []
+        self.continents = {}
+        self.board_layout = layout
+        self.tilemanager = tilemanager
+        self.deck = deck
+        self.max_turns = 0
+        self.starting_armies = starting_armies
+        self.state = None
+        self.zobrist = None
+        #Own random stream for the card draws, the same seed plays the same game
+        self.rng = random.Random(seed)
+        #Checks the running counters against a full recount after every change
+        self.debug_counting = False
+        #GameRecorder that gets every click and move played on this game, clones do not record
+        self.recorder = None
+
+    def initialize_game(self):
+        self.create_board()
+        self.state = GameState(len(self.board.tile_list), len(self.board.continent_list), len(self.players), len(self.deck.goods) + 1)
+        self.zobrist = get_zobrist(len(self.board.tile_list), len(self.players), len(self.deck.goods) + 1, self.deck)
+        self.set_up_starting_armies(self.starting_armies)
+        self.set_phase(Phases.PickCard)
+        self.set_player_coins()
+        self.prepare_deck_cards()
+        self.set_max_turns()
+        while len(self.state.active_cards) < 6:
+            self.draw_card()
+        self.thorough_counting()
+        self.scoring_handler()
+        self.state.hash = self.zobrist.full_hash(self.state)
+
+    def clone_game(self, rng=None):
+        #Board, players, deck and tilemanager are shared, only the state arrays are copied
+        #The clone draws the same cards as the original unless it gets a random stream of its own
+        cloned_game = copy.copy(self)
+        cloned_game.state = self.state.copy()
+        cloned_game.rng = copy.copy(self.rng) if rng is None else rng
+        cloned_game.recorder = None
+        return cloned_game
+
+    #Playouts on one working copy - every change after checkpoint() is recorded and rollback() returns the state to it
+    def checkpoint(self):
+        return self.state.checkpoint()
+
+    def rollback(self, checkpoint):
+        self.state.rollback(checkpoint)
+
+    def create_board(self):
+        self.board = get_board(self.board_layout)
+        self.tiles = self.board.tiles
+        self.continents = self.board.continents
+
+    def display_tile_info(self):
+        for tile in self.board.tile_list:
+            continent_id = tile.continent.continent_id if tile.continent else 'None'
+            print(f"Tile ID: {tile.tile_id}, Continent: {continent_id}, Type: {tile.tile_type}, Armies: {list(self.state.tile_armies(tile.index))}, Cities: {list(self.state.tile_cities(tile.index))}" )
+        player_count = len(self.players)
+        for continent in self.board.continent_list:
+            armies = list(self.state.continent_armies[continent.index * player_count:(continent.index + 1) * player_count])
+            cities = list(self.state.continent_cities[continent.index * player_count:(continent.index + 1) * player_count])
+            print(f"Continent: {continent.continent_id}, Armies: {armies}, Cities: {cities}")
+
+    def set_phase(self, phase):
+        self.set_hashed("phase", phase)
+
+    #Fields covered by the Zobrist hash are only changed through set_hashed and add_hashed, which keep state.hash up to date
+    def set_hashed(self, name, value):
+        state = self.state
+        state.set("hash", state.hash ^ self.zobrist.field_key(name, state.__dict__[name]) ^ self.zobrist.field_key(name, value))
+        state.set(name, value)
+
+    def add_hashed(self, name, index, number):
+        state = self.state
+        values = state.__dict__[name]
+        value = values[index]
+        state.set("hash", state.hash ^ self.zobrist.count_key(name, index, value) ^ self.zobrist.count_key(name, index, value + number))
+        state.set_item(values, index, value + number)
+
+    def verify_hash(self):
+        return self.zobrist.full_hash(self.state) == self.state.hash
+
+    def thorough_counting(self):
+        state = self.state
+        for player_index in range(len(self.players)):
+            state.player_armies[player_index] = self.tilemanager.count_armies(state, player_index)
+            state.player_cities[player_index] = self.tilemanager.count_cities(state, player_index)
+            for continent in self.board.continent_list:
+                state.continent_armies[continent.index * state.player_count + player_index] = self.tilemanager.continent_army_count(state, player_index, continent)
+                state.continent_cities[continent.index * state.player_count + player_index] = self.tilemanager.continent_city_count(state, player_index, continent)
+            state.army_tiles[player_index] = tuple(tile.index for tile in self.board.tile_list if state.armies[tile.index * state.player_count + player_index] > 0)
+            state.city_tiles[player_index] = tuple(tile.index for tile in self.board.tile_list if state.cities[tile.index * state.player_count + player_index] > 0)
+
+    #Armies and cities are only changed through add_armies and add_cities, which keep the player and continent counters running
+    def add_armies(self, tile, player_index, number):
+        state = self.state
+        army_index = tile.index * state.player_count + player_index
+        if number != 0 and (state.armies[army_index] == 0 or state.armies[army_index] + number == 0):
+            self.update_tile_index(state.army_tiles, player_index, tile.index, state.armies[army_index] == 0)
+        self.add_hashed("armies", army_index, number)
+        state.add_item(state.player_armies, player_index, number)
+        if tile.continent is not None:
+            state.add_item(state.continent_armies, tile.continent.index * state.player_count + player_index, number)
+        self.update_control(tile)
+        if self.debug_counting:
+            assert self.verify_counting(), "army counters do not match the board"
+
+    def add_cities(self, tile, player_index, number):
+        state = self.state
+        city_index = tile.index * state.player_count + player_index
+        if number != 0 and (state.cities[city_index] == 0 or state.cities[city_index] + number == 0):
+            self.update_tile_index(state.city_tiles, player_index, tile.index, state.cities[city_index] == 0)
+        self.add_hashed("cities", city_index, number)
+        state.add_item(state.player_cities, player_index, number)
+        if tile.continent is not None:
+            state.add_item(state.continent_cities, tile.continent.index * state.player_count + player_index, number)
+        self.update_control(tile)
+        if self.debug_counting:
+            assert self.verify_counting(), "city counters do not match the board"
+
+    def update_tile_index(self, tile_indexes, player_index, tile_index, occupied):
+        tiles = tile_indexes[player_index]
+        if occupied:
+            position = bisect(tiles, tile_index)
+            self.state.set_item(tile_indexes, player_index, tiles[:position] + (tile_index,) + tiles[position:])
+        else:
+            self.state.set_item(tile_indexes, player_index, tuple(index for index in tiles if index != tile_index))
+
+    def verify_counting(self):
+        check = self.clone_game()
+        check.thorough_counting()
+        return (check.state.player_armies == self.state.player_armies and check.state.player_cities == self.state.player_cities and
+                check.state.continent_armies == self.state.continent_armies and check.state.continent_cities == self.state.continent_cities and
+                check.state.army_tiles == self.state.army_tiles and check.state.city_tiles == self.state.city_tiles)
+
+    def update_control(self, tile):
+        #Only the changed tile and its continent can change owner
+        self.set_control(self.state.tile_control, tile.index, self.score_tile(tile))
+        if tile.continent is not None:
+            self.set_control(self.state.continent_control, tile.continent.index, self.score_continent(tile.continent))
+
+    def set_control(self, control, index, player_index):
+        if player_index is None:
+            player_index = -1
+        state = self.state
+        if control[index] != player_index:
+            if control[index] != -1:
+                state.add_item(state.score, control[index], -1)
+            if player_index != -1:
+                state.add_item(state.score, player_index, 1)
+            state.set_item(control, index, player_index)
+
+    def update_goods_score(self, player_index):
+        state = self.state
+        goods_score = self.goods_score(player_index)
+        state.add_item(state.score, player_index, goods_score - state.goods_score[player_index])
+        state.set_item(state.goods_score, player_index, goods_score)
+
+    def set_player_coins(self):
+        if len(self.players) == 5:
+            coins = 8
+        elif len(self.players) == 4:
+            coins = 9
+        elif len(self.players) == 3:
+            coins = 11
+        else:
+            coins = 14
+        for player_index in range(len(self.players)):
+            self.state.coins[player_index] = coins
+
+    def set_max_turns(self):
+        if len(self.players) == 5:
+            self.max_turns = 7
+        elif len(self.players) == 4:
+            self.max_turns = 8
+        elif len(self.players) == 3:
+            self.max_turns = 10
+        else:
+            self.max_turns = 13
+
+    def card_cost(self, card):
+        return math.ceil(self.state.active_cards.index(card.index)/2)
+
+    def get_active_cards(self):
+        return [self.deck.cards[card_index] for card_index in self.state.active_cards]
+
+    def play_card(self, played_card):
+        state = self.state
+        self.add_hashed("coins", state.active_player, -self.card_cost(played_card))
+        if played_card.good != "Joker":
+            self.add_good(self.deck.goods[played_card.good], played_card.quantity)
+        else:
+            self.add_joker(played_card.quantity)
+        if len(played_card.abilities) > 1:
+            if played_card.isor:
+                self.set_phase(Phases.PickAbilityOR)
+            else:
+                self.set_phase(Phases.PickAbilityAND)
+            self.set_hashed("viable_abilities", state.viable_abilities + played_card.abilities)
+        else:
+            self.pick_ability(played_card.abilities[0])
+        self.set_hashed("active_cards", [card_index for card_index in state.active_cards if card_index != played_card.index])
+
+    def add_good(self, good, quantity):
+        state = self.state
+        self.add_hashed("goods", state.active_player * state.goods_count + good.index, quantity)
+        self.update_goods_score(state.active_player)
+
+    def add_joker(self, quantity):
+        state = self.state
+        self.add_hashed("goods", state.active_player * state.goods_count + self.deck.joker_index, quantity)
+
+    def joker_count(self, player_index):
+        return self.state.goods[player_index * self.state.goods_count + self.deck.joker_index]
+
+    def pick_ability(self, picked_ability):
+        self.set_manuevers(picked_ability.manuevers)
+        if isinstance(picked_ability, BuildArmies):
+            self.set_phase(Phases.BuildArmy)
+        elif isinstance(picked_ability, BuildCities):
+            self.set_phase(Phases.BuildCity)
+        elif isinstance(picked_ability, MoveArmies):
+            self.set_phase(Phases.MoveArmy)
+        elif isinstance(picked_ability, DestroyArmies):
+            self.set_hashed("target_player", 0 if self.state.active_player != 0 else 1)
+            self.set_phase(Phases.DestroyArmy)
+        elif isinstance(picked_ability, SailArmies):
+            self.set_phase(Phases.SailArmy)
+
+    def next_player(self):
+        self.set_hashed("active_player", (self.state.active_player + 1)%len(self.players))
+
+    def set_manuevers(self, number):
+        self.set_hashed("manuevers", number)
+
+    def set_up_starting_armies(self, number):
+        for tile in self.board.starting_tiles:
+            for i in range(len(self.players)):
+                self.state.armies[tile.index * self.state.player_count + i] = number
+
+    def destroy_armies(self, target_tile):
+        state = self.state
+        player_index = state.target_player
+        army_index = target_tile.index * state.player_count + player_index
+        if state.armies[army_index] > 0 and state.manuevers > 0:
+            self.add_armies(target_tile, player_index, -1)
+            self.set_manuevers(state.manuevers - 1)
+
+    def build_armies(self, target_tile):
+        state = self.state
+        army_index = target_tile.index * state.player_count + state.active_player
+        if (target_tile.is_starting_tile or state.cities[army_index] > 0) and state.player_armies[state.active_player] < self.max_armies and state.manuevers > 0:
+            self.add_armies(target_tile, state.active_player, 1)
+            self.set_manuevers(state.manuevers - 1)
+
+    def build_cities(self, target_tile):
+        state = self.state
+        city_index = target_tile.index * state.player_count + state.active_player
+        if state.armies[city_index] > 0 and state.player_cities[state.active_player] < self.max_cities and state.manuevers > 0:
+            self.add_cities(target_tile, state.active_player, 1)
+            self.set_manuevers(state.manuevers-1)
+
+    def move_armies(self, target_tile):
+        self.move_or_sail_armies(target_tile, self.tilemanager.movable_tiles)
+
+    def sail_armies(self, target_tile):
+        self.move_or_sail_armies(target_tile, self.tilemanager.sailable_tiles)
+
+    def move_or_sail_armies(self, target_tile, reachable_tiles):
+        state = self.state
+        army_index = target_tile.index * state.player_count + state.active_player
+        if state.armies[army_index] > 0 and (state.selected_armies == 0 or state.move_cost[target_tile.index] == 0):
+            self.add_armies(target_tile, state.active_player, -1)
+            self.tilemanager.set_selected_armies(state, state.selected_armies + 1)
+            reachable_tiles(state, target_tile, state.manuevers)
+            self.tilemanager.set_active_tile(state, target_tile.index)
+        elif state.is_clickable(target_tile.index):
+            self.add_armies(target_tile, state.active_player, state.selected_armies)
+            self.set_manuevers(state.manuevers - state.move_cost[target_tile.index])
+            self.tilemanager.set_selected_armies(state, 0)
+            self.tilemanager.reset_movable_tiles(state)
+            self.tilemanager.set_active_tile(state, None)
+
+    def remove_viable_ability(self, ability):
+        viable_abilities = self.state.viable_abilities[:]
+        viable_abilities.remove(ability)
+        self.set_hashed("viable_abilities", viable_abilities)
+
+    def clickloop(self, clicked_element):
+        #self.display_tile_info()
+        state = self.state
+        phase = state.phase
+        if isinstance(clicked_element, Card) and phase == Phases.PickCard and clicked_element.index in state.active_cards and self.card_cost(clicked_element) <= state.coins[state.active_player]:
+            self.play_card(clicked_element)
+        elif isinstance(clicked_element, Ability) and phase == Phases.PickAbilityAND:
+            self.pick_ability(clicked_element)
+            self.remove_viable_ability(clicked_element)
+        elif isinstance(clicked_element, Ability) and phase == Phases.PickAbilityOR:
+            self.pick_ability(clicked_element)
+            self.set_hashed("viable_abilities", [])
+        elif isinstance(clicked_element, Tile) and phase == Phases.BuildArmy:
+            self.build_armies(clicked_element)
+        elif isinstance(clicked_element, Tile) and phase == Phases.BuildCity:
+            self.build_cities(clicked_element)
+        elif isinstance(clicked_element, Tile) and phase == Phases.MoveArmy:
+            self.move_armies(clicked_element)
+        elif isinstance(clicked_element, Tile) and phase == Phases.DestroyArmy:
+            self.destroy_armies(clicked_element)
+        elif isinstance(clicked_element, Player) and phase == Phases.DestroyArmy:
+            self.set_hashed("target_player", self.players.index(clicked_element))
+        elif isinstance(clicked_element, Tile) and phase == Phases.SailArmy:
+            self.sail_armies(clicked_element)
+        elif isinstance(clicked_element, Good) and phase == Phases.JokerAssignment and state.manuevers > 0:
+            self.add_good(clicked_element, 1)
+            self.set_manuevers(state.manuevers-1)
+        if self.recorder is not None:
+            self.recorder.record_click(self, clicked_element)
+
+    def apply_move(self, move):
+        #Plays a move from encode_move directly, with the same checks as the clicks in clickloop
+        state = self.state
+        phase = state.phase
+        kind = move_kind(move)
+        source = move_source(move)
+        target = move_target(move)
+        if kind == MOVE_END:
+            self.end_move_handler()
+        elif kind == MOVE_CARD and phase == Phases.PickCard and source in state.active_cards and self.card_cost(self.deck.cards[source]) <= state.coins[state.active_player]:
+            self.play_card(self.deck.cards[source])
+        elif kind == MOVE_ABILITY and phase == Phases.PickAbilityAND:
+            ability = state.viable_abilities[source]
+            self.pick_ability(ability)
+            self.remove_viable_ability(ability)
+        elif kind == MOVE_ABILITY and phase == Phases.PickAbilityOR:
+            self.pick_ability(state.viable_abilities[source])
+            self.set_hashed("viable_abilities", [])
+        elif kind == MOVE_BUILD_ARMY and phase == Phases.BuildArmy:
+            self.build_armies(self.board.tile_list[target])
+        elif kind == MOVE_BUILD_CITY and phase == Phases.BuildCity:
+            self.build_cities(self.board.tile_list[target])
+        elif kind == MOVE_ARMY and (phase == Phases.MoveArmy or phase == Phases.SailArmy):
+            self.move_army(self.board.tile_list[source], self.board.tile_list[target], phase == Phases.SailArmy)
+        elif kind == MOVE_DESTROY and phase == Phases.DestroyArmy:
+            self.set_hashed("target_player", source)
+            self.destroy_armies(self.board.tile_list[target])
+        elif kind == MOVE_JOKER and phase == Phases.JokerAssignment and state.manuevers > 0:
+            self.add_good(self.deck.good_list[target], 1)
+            self.set_manuevers(state.manuevers-1)
+        #The end of a move is recorded by end_move_handler
+        if self.recorder is not None and kind != MOVE_END:
+            self.recorder.record_move(self, move)
+
+    def move_army(self, source_tile, target_tile, sail):
+        #One army from source to target - the same as selecting it on source and clicking target
+        state = self.state
+        if state.armies[source_tile.index * state.player_count + state.active_player] > 0 and state.selected_armies == 0:
+            distances = self.board.sail_distances(source_tile.index) if sail else self.board.land_distances(source_tile.index)
+            if 0 < distances[target_tile.index] <= state.manuevers:
+                self.add_armies(source_tile, state.active_player, -1)
+                self.add_armies(target_tile, state.active_player, 1)
+                self.set_manuevers(state.manuevers - distances[target_tile.index])
+
+    def end_move_handler(self):
+        state = self.state
+        if state.phase == Phases.JokerAssignment:
+            self.next_player()
+            if state.active_player == 0:
+                self.set_phase(Phases.EndGame)
+                self.endgame_handler()
+                #print(self.winners)
+            else:
+                self.set_manuevers(self.joker_count(state.active_player))
+        elif state.phase != Phases.PickCard:
+            self.set_manuevers(0)
+            self.return_selected_armies()
+            self.tilemanager.reset_movable_tiles(state)
+            if state.phase == Phases.PickAbilityOR or state.phase == Phases.PickAbilityAND:
+                self.set_hashed("viable_abilities", [])
+            if len(state.viable_abilities) > 0:
+                self.set_phase(Phases.PickAbilityAND)
+            else:
+                self.set_phase(Phases.PickCard)
+                self.next_player()
+                self.draw_card()
+            if state.active_player == 0:
+                self.set_hashed("turn", state.turn + 1)
+                if state.turn > self.max_turns:
+                    self.set_manuevers(self.joker_count(state.active_player))
+                    self.set_phase(Phases.JokerAssignment)
+        if self.recorder is not None:
+            self.recorder.record_move(self, MOVE_END)
+
+    def return_selected_armies(self):
+        #Armies picked up for a move that was not finished go back to their tile
+        state = self.state
+        if state.active_tile != None:
+            self.add_armies(self.board.tile_list[state.active_tile], state.active_player, state.selected_armies)
+            self.tilemanager.set_selected_armies(state, 0)
+
+    def score_tile_or_continent(self, armies_and_cities):
+        most_armies_and_cities = max(armies_and_cities)
+        if armies_and_cities.count(most_armies_and_cities) > 1:
+            return None
+        return armies_and_cities.index(most_armies_and_cities)
+
+    def score_tile(self, tile):
+        offset = tile.index * self.state.player_count
+        end = offset + self.state.player_count
+        return self.score_tile_or_continent(list(map(operator.add, self.state.armies[offset:end], self.state.cities[offset:end])))
+
+    def score_continent(self, continent):
+        offset = continent.index * self.state.player_count
+        end = offset + self.state.player_count
+        return self.score_tile_or_continent(list(map(operator.add, self.state.continent_armies[offset:end], self.state.continent_cities[offset:end])))
+
+    def control_list(self, armies, cities):
+        #Controlling player (or None) for every tile or continent in the given state arrays
+        player_count = len(self.players)
+        armies_and_cities = list(map(operator.add, armies, cities))
+        return [self.score_tile_or_continent(armies_and_cities[offset:offset + player_count]) for offset in range(0, len(armies_and_cities), player_count)]
+
+    #Full rescan of the board - during the game the score is kept up to date by update_control and update_goods_score
+    def scoring_handler(self):
+        state = self.state
+        score = state.score
+        for player_index in range(len(self.players)):
+            score[player_index] = 0
+        for tile_index, tile_scoring in enumerate(self.control_list(state.armies, state.cities)):
+            state.tile_control[tile_index] = -1 if tile_scoring is None else tile_scoring
+            if tile_scoring is not None:
+                score[tile_scoring] += 1
+        for continent_index, continent_scoring in enumerate(self.control_list(state.continent_armies, state.continent_cities)):
+            state.continent_control[continent_index] = -1 if continent_scoring is None else continent_scoring
+            if continent_scoring is not None:
+                score[continent_scoring] += 1
+        self.goods_scoring()
+
+    def goods_scoring(self):
+        for player_index in range(len(self.players)):
+            self.state.goods_score[player_index] = self.goods_score(player_index)
+            self.state.score[player_index] += self.state.goods_score[player_index]
+
+    def goods_score(self, player_index):
+        state = self.state
+        goods_score = 0
+        for good in self.deck.goods.values():
+            quantity = state.goods[player_index * state.goods_count + good.index]
+            if quantity >= good.score1:
+                goods_score += 1
+            if quantity >= good.score2:
+                goods_score += 1
+            if quantity >= good.score3:
+                goods_score += 1
+            if quantity >= good.score5:
+                goods_score += 2
+        return goods_score
+
+    def verify_scoring(self):
+        #Debug check - a full rescan of a clone has to give the same score as the incremental updates
+        check = self.clone_game()
+        check.thorough_counting()
+        check.scoring_handler()
+        return check.state.score == self.state.score and check.state.tile_control == self.state.tile_control and check.state.continent_control == self.state.continent_control
+
+    def endgame_handler(self):
+        state = self.state
+        # Determining the player(s) with the top score
+        top_score = max(state.score)
+        winners = [player_index for player_index in range(len(self.players)) if state.score[player_index] == top_score]
+
+        # If there's a tie on score, check for top coins
+        if len(winners) > 1:
+            top_coins = max(state.coins[player_index] for player_index in winners)
+            # Retain only the players with the top coins count among the tied players
+            winners = [player_index for player_index in winners if state.coins[player_index] == top_coins]
+
+        #If there's still a tie, check for top tiles controlled
+        if len(winners) > 1:
+            tiles_controlled = [state.tile_control.count(player_index) for player_index in range(len(self.players))]
+            top_tiles_controlled = max(tiles_controlled)
+            winners = [player_index for player_index in winners if tiles_controlled[player_index] == top_tiles_controlled]
+
+        # If there's still a tie, check for top armies
+        if len(winners) > 1:
+            top_armies = max(state.player_armies[player_index] for player_index in winners)
+            # Retain only the players with the top armies count among the tied players
+            winners = [player_index for player_index in winners if state.player_armies[player_index] == top_armies]
+
+        state.set("winners", winners)
+        return state.winners
+
+
+    def prepare_deck_cards(self):
+        self.state.deck_cards += [card.index for card in self.deck.default_deck]
+        if len(self.players) > 4:
+            self.state.deck_cards += [card.index for card in self.deck.bonus_deck]
+
+    def draw_card(self):
+        try:
+            drawn_card = self.rng.choice(self.state.deck_cards)
+            deck_cards = self.state.deck_cards[:]
+            deck_cards.remove(drawn_card)
+            #Only the drawn card changes the hash, it is appended to the active cards and leaves the deck
+            state = self.state
+            state.set("hash", state.hash ^ self.zobrist.count_key("active_cards", drawn_card, len(state.active_cards) + 1) ^ self.zobrist.count_key("deck_cards", drawn_card, 1))
+            state.set("active_cards", state.active_cards + [drawn_card])
+            state.set("deck_cards", deck_cards)
+        except:
+            logger.warning("Not enough cards")
@@ -0,0 +1,180 @@
+import argparse
+import os
+import struct
+from bisect import bisect
+from game import Phases, Card, Ability, Tile, Player, Good, encode_move, move_kind, move_source, move_target
+from snapshot import encode_game, decode_game
+from game_setup import create_game
+
+#Record of one game - a snapshot of the start, then every move and click as an 8 byte entry packed like a move, with a snapshot every snapshot_every moves
+#Entries are only ever appended, a record cut off by a crash still replays up to its last whole entry
+#A new record replaces the file, with resume it continues a record that ends at the state of the game - the new entries start with a snapshot of it
+RECORD_MAGIC = b"BPRC"
+RECORD_VERSION = 2
+
+#Entry kinds 0-7 are the MOVE_ kinds of game.py played through apply_move, the clicks are played through clickloop
+CLICK_CARD = 8
+CLICK_ABILITY = 9
+CLICK_TILE = 10
+CLICK_PLAYER = 11
+CLICK_GOOD = 12
+SNAPSHOT = 255
+
+HEADER = struct.Struct("<4sH")
+ENTRY = struct.Struct("<Q")
+SNAPSHOT_SIZE = struct.Struct("<I")
+
+class GameRecorder:
+    def __init__(self, path, game, seed=None, snapshot_every=100, resume=False):
+        if resume and os.path.exists(path) and os.path.getsize(path) > 0:
+            #Only the same game is continued, a record of another one would replay into the wrong state
+            if GameReplay(path).game_at().state.key() != game.state.key():
+                raise ValueError(f"{path} does not end at the state of the resumed game, it cannot be continued")
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            seed_text = b"" if seed is None else str(seed).encode("utf-8")
+            self.file.write(HEADER.pack(RECORD_MAGIC, RECORD_VERSION) + struct.pack("<H", len(seed_text)) + seed_text)
+        self.snapshot_every = snapshot_every
+        self.moves = 0
+        self.write_snapshot(game)
+        game.recorder = self
+
+    def write_snapshot(self, game):
+        snapshot = encode_game(game)
+        self.file.write(ENTRY.pack(encode_move(SNAPSHOT)) + SNAPSHOT_SIZE.pack(len(snapshot)) + snapshot)
+
+    def write(self, game, kind, source, target):
+        self.file.write(ENTRY.pack(encode_move(kind, source, target)))
+        self.moves += 1
+        if self.moves % self.snapshot_every == 0:
+            self.write_snapshot(game)
+
+    def record_move(self, game, move):
+        self.write(game, move_kind(move), move_source(move), move_target(move))
+
+    def record_click(self, game, clicked_element):
+        if isinstance(clicked_element, Card):
+            self.write(game, CLICK_CARD, clicked_element.index, 0)
+        elif isinstance(clicked_element, Ability):
+            self.write(game, CLICK_ABILITY, clicked_element.index, 0)
+        elif isinstance(clicked_element, Tile):
+            self.write(game, CLICK_TILE, clicked_element.index, 0)
+        elif isinstance(clicked_element, Player):
+            self.write(game, CLICK_PLAYER, game.players.index(clicked_element), 0)
+        elif isinstance(clicked_element, Good):
+            self.write(game, CLICK_GOOD, clicked_element.index, 0)
+
+    def close(self):
+        self.file.close()
+
+#Rebuilds the game after any number of moves from the nearest snapshot before it, only the entries and snapshot offsets are kept in memory
+class GameReplay:
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.data = file.read()
+        magic, version = HEADER.unpack_from(self.data, 0)
+        if magic != RECORD_MAGIC:
+            raise ValueError("Not a game record")
+        if version != RECORD_VERSION:
+            raise ValueError(f"Record version {version} is not supported, only version {RECORD_VERSION}")
+        seed_length, = struct.unpack_from("<H", self.data, HEADER.size)
+        offset = HEADER.size + 2 + seed_length
+        seed_text = self.data[offset - seed_length:offset].decode("utf-8")
+        self.seed = seed_text if seed_text else None
+        self.entries = []
+        #Number of moves played before every snapshot and where the snapshot is
+        self.snapshot_moves = []
+        self.snapshot_offsets = []
+        while offset + ENTRY.size <= len(self.data):
+            entry, = ENTRY.unpack_from(self.data, offset)
+            kind = move_kind(entry)
+            offset += ENTRY.size
+            if kind == SNAPSHOT:
+                if offset + SNAPSHOT_SIZE.size > len(self.data):
+                    break
+                size, = SNAPSHOT_SIZE.unpack_from(self.data, offset)
+                offset += SNAPSHOT_SIZE.size
+                if offset + size > len(self.data):
+                    break
+                self.snapshot_moves.append(len(self.entries))
+                self.snapshot_offsets.append((offset, size))
+                offset += size
+            else:
+                self.entries.append((kind, move_source(entry), move_target(entry)))
+        if not self.snapshot_moves:
+            raise ValueError("Game record has no starting snapshot")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def game_at(self, moves=None):
+        #The game after the first moves entries, all of them when moves is None
+        if moves is None or moves > len(self.entries):
+            moves = len(self.entries)
+        snapshot_index = bisect(self.snapshot_moves, moves) - 1
+        offset, size = self.snapshot_offsets[snapshot_index]
+        game = decode_game(self.data[offset:offset + size])
+        for entry in self.entries[self.snapshot_moves[snapshot_index]:moves]:
+            self.play_entry(game, entry)
+        return game
+
+    def play_entry(self, game, entry):
+        kind, source, target = entry
+        if kind == CLICK_CARD:
+            game.clickloop(game.deck.cards[source])
+        elif kind == CLICK_ABILITY:
+            game.clickloop(game.deck.abilities[source])
+        elif kind == CLICK_TILE:
+            game.clickloop(game.board.tile_list[source])
+        elif kind == CLICK_PLAYER:
+            game.clickloop(game.players[source])
+        elif kind == CLICK_GOOD:
+            game.clickloop(game.deck.good_list[source])
+        else:
+            game.apply_move(encode_move(kind, source, target))
+
+#Records a seeded random game and checks that the replay gets to the same state after every move
+def check_game(path, seed, snapshot_every):
+    #The AI is only needed for the random moves of the check
+    from ai_manager import AI_manager
+    game = create_game(seed=seed)
+    recorder = GameRecorder(path, game, seed, snapshot_every)
+    ai = AI_manager(0, seed=seed)
+    keys = [game.state.key()]
+    while game.state.phase != Phases.EndGame:
+        game.apply_move(ai.pick_random_instruction(ai.create_options(game)))
+        keys.append(game.state.key())
+    recorder.close()
+    replay = GameReplay(path)
+    if len(replay) != len(keys) - 1:
+        raise ValueError(f"Record of seed {seed} has {len(replay)} moves, the game had {len(keys) - 1}")
+    for moves, key in enumerate(keys):
+        replayed = replay.game_at(moves)
+        if replayed.state.key() != key or not replayed.verify_hash():
+            raise ValueError(f"Replay of seed {seed} differs from the game after {moves} moves")
+    return len(replay)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays a game record without the GUI")
+    parser.add_argument("record")
+    parser.add_argument("--move", type=int, help="number of moves to replay, all of them by default")
+    parser.add_argument("--check", type=int, metavar="GAMES", help="record this many seeded random games into the record file and check their replays instead")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first checked game")
+    args = parser.parse_args()
+    if args.check:
+        for game_index in range(args.check):
+            seed = args.seed + game_index
+            moves = check_game(args.record, seed, 17)
+            print(f"Seed {seed}: {moves} moves, the replay matches the game after every move")
+        return
+    replay = GameReplay(args.record)
+    game = replay.game_at(args.move)
+    state = game.state
+    print(f"{len(replay)} moves, {len(replay.snapshot_moves)} snapshots, seed {replay.seed}")
+    print(f"Turn {state.turn}/{game.max_turns} - {state.phase.name} - {game.players[state.active_player].name} on the move")
+    for player_index, player in enumerate(game.players):
+        print(f"{player.name}: {state.score[player_index]} score, {state.coins[player_index]} coins, {state.player_armies[player_index]} armies, {state.player_cities[player_index]} cities")
+
+if __name__ == "__main__":
+    main()
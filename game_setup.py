@@ -0,0 +1,127 @@
+import random
+from game import Deck, Good, Card, BuildArmies, BuildCities, MoveArmies, DestroyArmies, SailArmies, Player, TileManager, Game
+
+STARTING_ARMIES = 3
+MAX_ARMIES = 14
+MAX_CITIES = 3
+
+
+board_layout = [
+    "WGGWWG",
+    "WGGWWG",
+    "WWSWGG",
+    "GWGWWW",
+    "GWGGWG"
+]
+
+defualtcards = []
+bonuscards = []
+default_goods = {
+    "Food" : Good("Food", [3,5,7,8]),
+    "Wood" : Good("Wood", [2,4,5,6]),
+    "Coal" : Good("Coal", [2,3,4,5]),
+    "Gem"  : Good("Gem", [1,2,3,4]),
+    "Iron" : Good("Iron", [2,4,6,7])
+}
+ABILITIES = {
+    "city" :  BuildCities(1),
+    "armies1" : BuildArmies(1),
+    "armies2" : BuildArmies(2),
+    "armies3" : BuildArmies(3),
+    "armies4" : BuildArmies(4),
+    "move2" : MoveArmies(2),
+    "move3" : MoveArmies(3),
+    "move4" : MoveArmies(4),
+    "move5" : MoveArmies(5),
+    "move6" : MoveArmies(6),
+    "sail2" : SailArmies(2),
+    "sail3" : SailArmies(3),
+    "sail4" : SailArmies(4),
+    "destroy" : DestroyArmies(1)
+}
+
+
+#Woodcards
+defualtcards.append(Card([ABILITIES["city"]], "Wood", 1, False))
+defualtcards.append(Card([ABILITIES["armies3"]], "Wood", 1, False))
+defualtcards.append(Card([ABILITIES["move3"]], "Wood", 1, False))
+defualtcards.append(Card([ABILITIES["sail3"]], "Wood", 1, False))
+defualtcards.append(Card([ABILITIES["sail4"]], "Wood", 1, False))
+defualtcards.append(Card([ABILITIES["armies2"], ABILITIES["sail3"]], "Wood", 1, True))
+defualtcards.append(Card([ABILITIES["destroy"], ABILITIES["city"]], "Wood", 1, True))
+bonuscards.append(Card([ABILITIES["move6"]], "Wood", 1, False))
+
+#Coalcards
+defualtcards.append(Card([ABILITIES["armies2"]], "Coal", 1, False))
+defualtcards.append(Card([ABILITIES["move2"]], "Coal", 1, False))
+defualtcards.append(Card([ABILITIES["move3"]], "Coal", 1, False))
+defualtcards.append(Card([ABILITIES["move3"]], "Coal", 1, False))
+defualtcards.append(Card([ABILITIES["sail2"]], "Coal", 1, False))
+defualtcards.append(Card([ABILITIES["sail3"]], "Coal", 1, False))
+bonuscards.append(Card([ABILITIES["sail2"]], "Coal", 1, False))
+
+#Foodcards
+defualtcards.append(Card([ABILITIES["city"]], "Food", 1, False))
+defualtcards.append(Card([ABILITIES["city"]], "Food", 1, False))
+defualtcards.append(Card([ABILITIES["armies3"]], "Food", 1, False))
+defualtcards.append(Card([ABILITIES["armies3"]], "Food", 2, False))
+defualtcards.append(Card([ABILITIES["move4"]], "Food", 1, False))
+defualtcards.append(Card([ABILITIES["move4"]], "Food", 1, False))
+defualtcards.append(Card([ABILITIES["move5"]], "Food", 1, False))
+defualtcards.append(Card([ABILITIES["sail3"]], "Food", 1, False))
+defualtcards.append(Card([ABILITIES["destroy"], ABILITIES["armies1"]], "Food", 1, False))
+bonuscards.append(Card([ABILITIES["armies4"], ABILITIES["move2"]], "Food", 1, True))
+
+#Gemcards
+defualtcards.append(Card([ABILITIES["armies1"]], "Gem", 1, False))
+defualtcards.append(Card([ABILITIES["armies2"]], "Gem", 1, False))
+defualtcards.append(Card([ABILITIES["armies2"]], "Gem", 1, False))
+defualtcards.append(Card([ABILITIES["move2"]], "Gem", 1, False))
+bonuscards.append(Card([ABILITIES["armies2"]], "Gem", 1, False))
+
+#Ironcards
+defualtcards.append(Card([ABILITIES["city"]], "Iron", 1, False))
+defualtcards.append(Card([ABILITIES["armies3"]], "Iron", 1, False))
+defualtcards.append(Card([ABILITIES["armies3"]], "Iron", 1, False))
+defualtcards.append(Card([ABILITIES["move4"]], "Iron", 1, False))
+defualtcards.append(Card([ABILITIES["move5"]], "Iron", 1, False))
+defualtcards.append(Card([ABILITIES["sail3"]], "Iron", 1, False))
+defualtcards.append(Card([ABILITIES["armies3"], ABILITIES["move3"]], "Iron", 1, True))
+defualtcards.append(Card([ABILITIES["armies3"], ABILITIES["move4"]], "Iron", 1, True))
+bonuscards.append(Card([ABILITIES["move4"]], "Iron", 2, False))
+
+#Jokers
+defualtcards.append(Card([ABILITIES["armies2"]], "Joker", 1, False))
+defualtcards.append(Card([ABILITIES["sail2"]], "Joker", 1, False))
+defualtcards.append(Card([ABILITIES["sail2"]], "Joker", 1, False))
+
+
+def create_players(rng=random):
+    players = []
+    players.append(Player("Martin",False,"player_red"))
+    players.append(Player("Magda",False,"player_orange"))
+    players.append(Player("Ondra",False,"player_blue"))
+    players.append(Player("AI1",True,"player_green"))
+    players.append(Player("AI2",True,"player_yellow"))
+    rng.shuffle(players)
+    return players
+
+def create_deck():
+    return Deck(default_goods, defualtcards, bonuscards)
+
+#Random layout in the same format as board_layout - W water, G ground, S starting tile
+def generate_layout(width, height, water=0.4, starting_tiles=1, seed=None):
+    rng = random.Random(seed)
+    rows = [["W" if rng.random() < water else "G" for col in range(width)] for row in range(height)]
+    for row, col in rng.sample([(row, col) for row in range(height) for col in range(width)], starting_tiles):
+        rows[row][col] = "S"
+    return ["".join(row) for row in rows]
+
+#The same seed gives the same seating and card draws, None a different game every time
+def create_game(players=None, layout=board_layout, seed=None):
+    rng = random.Random(seed)
+    if players is None:
+        players = create_players(rng)
+    game = Game(create_deck(), layout, players, TileManager(), STARTING_ARMIES, MAX_ARMIES, MAX_CITIES, rng.getrandbits(64))
+    game.initialize_game()
+    return game
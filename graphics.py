@@ -0,0 +1,486 @@
+import time
+import pygame
+from game import Phases
+
+SCREEN_WIDTH = 1024
+SCREEN_HEIGHT = 720
+COLORS = {
+    "water_tile" : (0, 0, 139),
+    "ground_tile" : (0, 100, 0),
+    "clickable_tile" : (0, 150, 0),
+    "text_default" : (255, 255, 255),
+    "text_highlighted" : (250, 250, 0),
+    "player_red" : (255, 0, 0),
+    "player_green" : (0, 255, 0),
+    "player_blue" : (0, 0, 255),
+    "player_yellow" : (255, 255, 0),
+    "player_orange" : (255, 165, 0)
+}
+
+class GraphicManager:
+    def __init__(self, screen_width, screen_height, colors, game):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.RESIZABLE)
+        self.colors = colors
+        self.background = self.colors.get('background', (0, 0, 0))
+        self.game = game
+        #Fonts by size and rendered text by font, text and colour, shared by all elements
+        self.fonts = {}
+        self.text_cache = {}
+        #Retained mode only draws again the elements whose view changed since the last frame
+        self.retained = True
+        self.full_redraw = True
+        self.drawn_views = {}
+        self.drawn_rects = {}
+        self.tile_margin = 5
+        self.tile_size = 100
+        self.tile_graphics = []
+        self.prepare_tile_graphics()
+        num_columns = len(self.game.tiles[0])
+        num_rows = len(self.game.tiles)
+        board_width = num_columns * self.tile_size + (num_columns + 1) * self.tile_margin
+        board_height = num_rows * self.tile_size + (num_columns + 1) * self.tile_margin
+        self.side_menu_x = board_width + 10
+        self.side_menu_y_start = 10
+        self.side_menu_spacing = 30
+        self.side_menu_elements = []
+        self.player_list_x = 10
+        self.player_list_spacing = 30
+        self.player_list_y_start = board_height + 10
+        self.player_list_elements = []
+        self.prepare_side_menu_elements()
+        self.prepare_player_list()
+        self.good_list = Good_Scoring(self.game.deck.goods, self)
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.clicked_pos = None
+        self.stats_overlay = None
+        self.ai_status = None
+
+    def get_font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render_text(self, font, text, color):
+        key = (font, text, color)
+        text_surface = self.text_cache.get(key)
+        if text_surface is None:
+            #Texts with counts in them keep changing, the cache is started again when it gets big
+            if len(self.text_cache) > 2000:
+                self.text_cache.clear()
+            text_surface = self.text_cache[key] = font.render(text, True, color)
+        return text_surface
+
+    def prepare_tile_graphics(self):
+        for row_index, row in enumerate(self.game.tiles):
+            tile_graphics_row = []
+            for col_index, tile in enumerate(row):
+                x = col_index * (self.tile_size + self.tile_margin)
+                y = row_index * (self.tile_size + self.tile_margin)
+                tile_graphic = Tile_Graphic(self.tile_size, x, y, tile, self)
+                tile_graphics_row.append(tile_graphic)
+            self.tile_graphics.append(tile_graphics_row)
+
+    def draw_board(self):
+        for row in self.tile_graphics:
+            for tile_graphic in row:
+                tile_graphic.draw()
+
+    def prepare_side_menu_elements(self):
+        self.side_menu_elements = [Side_Menu_Title(self.side_menu_y_start, self)]
+
+        if self.game.state.phase == Phases.JokerAssignment:
+            for good in self.game.deck.goods:
+                self.side_menu_elements.append(
+                    JokerAssignmentButton(self.side_menu_y_start + len(self.side_menu_elements) * self.side_menu_spacing, self.game.deck.goods[good], self))
+        if self.game.state.phase == Phases.PickCard:
+            for card in self.game.get_active_cards():
+                self.side_menu_elements.append(Card_Button(self.side_menu_y_start + len(self.side_menu_elements) * self.side_menu_spacing, card, self))
+        if self.game.state.phase == Phases.PickAbilityAND or self.game.state.phase == Phases.PickAbilityOR:
+            for ability in self.game.state.viable_abilities:
+                self.side_menu_elements.append(Ability_Button(self.side_menu_y_start + len(self.side_menu_elements) * self.side_menu_spacing, ability, self))
+        if self.game.state.phase == Phases.DestroyArmy and self.game.state.manuevers > 0:
+            viable_players = []
+            viable_players += self.game.players
+            viable_players.remove(self.game.players[self.game.state.active_player])
+            for target in viable_players:
+                self.side_menu_elements.append(Target_Button(self.side_menu_y_start + len(self.side_menu_elements) * self.side_menu_spacing, target, self))
+
+    def draw_side_menu(self):
+        for element in self.side_menu_elements:
+            element.draw()
+
+    def prepare_player_list(self):
+        self.player_list_elements = []
+        for player in self.game.players:
+            self.player_list_elements.append(Player_List_Element(self.player_list_y_start + len(self.player_list_elements) * self.player_list_spacing, player, self))
+
+    def draw_player_list(self):
+        for element in self.player_list_elements:
+            element.draw()
+
+    def toggle_stats_overlay(self, ai_manager):
+        if self.stats_overlay is None:
+            self.stats_overlay = Stats_Overlay(ai_manager, self)
+        else:
+            self.stats_overlay = None
+
+    def show_ai_status(self, ai_thread):
+        self.ai_status = AI_Status(self.player_list_y_start + len(self.player_list_elements) * self.player_list_spacing, ai_thread, self)
+
+    def elements(self):
+        #In drawing order, later elements are drawn over earlier ones
+        elements = [tile_graphic for row in self.tile_graphics for tile_graphic in row]
+        elements += self.side_menu_elements + self.player_list_elements + [self.good_list]
+        if self.ai_status is not None:
+            elements.append(self.ai_status)
+        if self.stats_overlay is not None:
+            elements.append(self.stats_overlay)
+        return elements
+
+    def redraw_all(self):
+        self.full_redraw = True
+
+    def graphics(self):
+        self.mouse_pos = pygame.mouse.get_pos()
+        elements = self.elements()
+        views = {element: element.view() for element in elements}
+        if not self.retained or self.full_redraw:
+            self.screen.fill(self.background)
+            self.drawn_rects = {element: element.draw() for element in elements}
+            self.drawn_views = views
+            self.full_redraw = False
+            pygame.display.flip()
+            return
+        #Areas of removed elements and of elements whose view changed are cleared,
+        #every element overlapping a cleared area is drawn again in full
+        dirty = [rect for element, rect in self.drawn_rects.items() if element not in views]
+        redrawn = set()
+        for element in elements:
+            if element not in self.drawn_rects or views[element] != self.drawn_views[element]:
+                redrawn.add(element)
+                if element in self.drawn_rects:
+                    dirty.append(self.drawn_rects[element])
+        if not redrawn and not dirty:
+            return
+        growing = True
+        while growing:
+            growing = False
+            for element in elements:
+                if element not in redrawn and self.drawn_rects[element].collidelist(dirty) != -1:
+                    redrawn.add(element)
+                    dirty.append(self.drawn_rects[element])
+                    growing = True
+        for rect in dirty:
+            self.screen.fill(self.background, rect)
+        drawn_rects = {}
+        for element in elements:
+            if element in redrawn:
+                drawn_rects[element] = element.draw()
+                dirty.append(drawn_rects[element])
+            else:
+                drawn_rects[element] = self.drawn_rects[element]
+        self.drawn_rects = drawn_rects
+        self.drawn_views = views
+        pygame.display.update(dirty)
+
+    def click_handler(self):
+        self.clicked_pos = self.mouse_pos
+        clickable_elements = self.side_menu_elements + [tile_graphic for row in self.tile_graphics for tile_graphic in row]
+        for element in clickable_elements:
+            if isinstance(element, Clickable_Element) and element.clicked():
+                return getattr(element, 'card', None) or getattr(element, 'tile', None) or getattr(element, 'ability', None) or getattr(element,'player',None) or getattr(element,'good',None)
+
+class Clickable_Element:
+    def __init__(self, graphic_manager):
+        self.graphic_manager = graphic_manager
+        self.rect = None
+
+    def clicked(self):
+        if self.rect.collidepoint(self.graphic_manager.clicked_pos):
+            return True
+
+    def hovered(self, text):
+        #The rect is known before the text is drawn, so a new button is highlighted from its first frame
+        self.rect = pygame.Rect((self.graphic_manager.side_menu_x, self.y), self.font.size(text))
+        return self.rect.collidepoint(self.graphic_manager.mouse_pos)
+
+class Tile_Graphic(Clickable_Element):
+    def __init__(self, tile_size, x, y, tile, graphic_manager):
+        super().__init__(graphic_manager)
+        self.tile_size = tile_size
+        self.x = x
+        self.y = y
+        self.tile = tile
+        self.font = graphic_manager.get_font(int(self.tile_size/4))
+        self.rect = pygame.Rect(self.x, self.y, self.tile_size, self.tile_size)
+
+    def view(self):
+        state = self.graphic_manager.game.state
+        return (state.is_clickable(self.tile.index), tuple(state.tile_armies(self.tile.index)), tuple(state.tile_cities(self.tile.index)))
+
+    def draw(self):
+        rects = []
+        state = self.graphic_manager.game.state
+        if state.is_clickable(self.tile.index):
+            pygame.draw.rect(self.graphic_manager.screen, self.graphic_manager.colors["clickable_tile"], self.rect)
+        elif self.tile.tile_type == "water":
+            pygame.draw.rect(self.graphic_manager.screen, self.graphic_manager.colors["water_tile"], self.rect)
+        elif self.tile.tile_type == "ground":
+            pygame.draw.rect(self.graphic_manager.screen, self.graphic_manager.colors["ground_tile"], self.rect)
+        if self.tile.is_starting_tile:
+            text_surface = self.graphic_manager.render_text(self.font, 'S', self.graphic_manager.colors["text_default"])
+            text_x = self.x + (self.tile_size - text_surface.get_width()) / 2
+            text_y = self.y + (self.tile_size - text_surface.get_height()) / 2
+            self.graphic_manager.screen.blit(text_surface, (text_x, text_y))
+        for player_index, armies in enumerate(state.tile_armies(self.tile.index)):
+            if armies > 0:
+                player_color = self.graphic_manager.game.players[player_index].color
+                army_text = self.graphic_manager.render_text(self.font, str(armies), self.graphic_manager.colors[player_color])
+                army_text_x = + self.x + (player_index * (self.tile_size / 5)) + int(self.tile_size/20)
+                army_text_y = self.y + self.tile_size - self.font.get_height() - 5
+                #Counts of 10 and more reach over the edge of the tile
+                rects.append(self.graphic_manager.screen.blit(army_text, (army_text_x, army_text_y)))
+        for player_index, cities in enumerate(state.tile_cities(self.tile.index)):
+            if cities > 0:
+                player_color = self.graphic_manager.game.players[player_index].color
+                city_text = self.graphic_manager.render_text(self.font, str(cities), self.graphic_manager.colors[player_color])
+                city_text_x = self.x + (player_index * (self.tile_size / 5)) + int(self.tile_size/20)
+                city_text_y = self.y + 5
+                rects.append(self.graphic_manager.screen.blit(city_text, (city_text_x, city_text_y)))
+        return self.rect.unionall(rects)
+
+class Card_Button(Clickable_Element):
+    def __init__(self, y, card, graphic_manager):
+        super().__init__(graphic_manager)
+        self.y = y
+        self.card = card
+        # self.graphic_manager.side_menu_font
+        self.font = graphic_manager.get_font(24)
+        self.rect = None
+        self.text_color = "text_default"
+
+    def text(self):
+        ability_descriptions = [ability.ability_description for ability in self.card.abilities]
+        abilities_text = ' AND '.join(ability_descriptions) if not self.card.isor else ' OR '.join(ability_descriptions)
+        return f"Cost {self.graphic_manager.game.card_cost(self.card)}: {self.card.quantity}x {self.card.good} - {abilities_text}"
+
+    def view(self):
+        text = self.text()
+        self.text_color = "text_highlighted" if self.hovered(text) else "text_default"
+        return (text, self.text_color)
+
+    def draw(self):
+        text_surface = self.graphic_manager.render_text(self.font, self.text(), self.graphic_manager.colors[self.text_color])
+        self.rect = text_surface.get_rect(x=self.graphic_manager.side_menu_x, y=self.y)
+        self.graphic_manager.screen.blit(text_surface, (self.graphic_manager.side_menu_x, self.y))
+        return self.rect
+
+class Ability_Button(Clickable_Element):
+    def __init__(self, y, ability, graphic_manager):
+        super().__init__(graphic_manager)
+        self.y = y
+        self.ability = ability
+        # self.graphic_manager.side_menu_font
+        self.font = graphic_manager.get_font(24)
+        self.rect = None
+        self.text_color = "text_default"
+
+    def view(self):
+        self.text_color = "text_highlighted" if self.hovered(self.ability.ability_description) else "text_default"
+        return self.text_color
+
+    def draw(self):
+        text_surface = self.graphic_manager.render_text(self.font, self.ability.ability_description, self.graphic_manager.colors[self.text_color])
+        self.rect = text_surface.get_rect(x=self.graphic_manager.side_menu_x, y=self.y)
+        self.graphic_manager.screen.blit(text_surface, (self.graphic_manager.side_menu_x, self.y))
+        return self.rect
+
+class JokerAssignmentButton(Clickable_Element):
+    def __init__(self, y, good, graphic_manager):
+        super().__init__(graphic_manager)
+        self.y = y
+        self.good = good
+        # self.graphic_manager.side_menu_font
+        self.font = graphic_manager.get_font(24)
+        self.rect = None
+        self.text_color = "text_default"
+
+    def view(self):
+        self.text_color = "text_highlighted" if self.hovered(self.good.name) else "text_default"
+        return self.text_color
+
+    def draw(self):
+        text_surface = self.graphic_manager.render_text(self.font, self.good.name, self.graphic_manager.colors[self.text_color])
+        self.rect = text_surface.get_rect(x=self.graphic_manager.side_menu_x, y=self.y)
+        self.graphic_manager.screen.blit(text_surface, (self.graphic_manager.side_menu_x, self.y))
+        return self.rect
+
+class Target_Button(Clickable_Element):
+    def __init__(self, y, player, graphic_manager):
+        super().__init__(graphic_manager)
+        self.y = y
+        self.player = player
+        # self.graphic_manager.side_menu_font
+        self.font = graphic_manager.get_font(24)
+        self.rect = None
+        self.text_color = "text_default"
+
+    def view(self):
+        self.text_color = "text_highlighted" if self.hovered(self.player.name) else self.player.color
+        return self.text_color
+
+    def draw(self):
+        text_surface = self.graphic_manager.render_text(self.font, self.player.name, self.graphic_manager.colors[self.text_color])
+        self.rect = text_surface.get_rect(x=self.graphic_manager.side_menu_x, y=self.y)
+        self.graphic_manager.screen.blit(text_surface, (self.graphic_manager.side_menu_x, self.y))
+        return self.rect
+
+class Side_Menu_Title:
+    def __init__(self, y, graphic_manager):
+        self.y = y
+        self.graphic_manager = graphic_manager
+        # self.graphic_manager.side_menu_font
+        self.font = graphic_manager.get_font(24)
+
+    def view(self):
+        state = self.graphic_manager.game.state
+        winners = [self.graphic_manager.game.players[player_index] for player_index in state.winners]
+        if state.phase == Phases.EndGame:
+            if len(winners) > 1:
+                text = f"DRAW!"
+                for winner in winners:
+                    text += f" {winner.name}"
+                player_color = "text_default"
+            else:
+                text = f"WINNER: {winners[0].name}"
+                player_color = winners[0].color
+        else:
+            player_color = self.graphic_manager.game.players[state.active_player].color
+            player_name = self.graphic_manager.game.players[state.active_player].name
+            player_coins = state.coins[state.active_player]
+            text = f"{player_name} - Turn {state.turn}/{self.graphic_manager.game.max_turns} - {state.phase.name}"
+            if state.phase == Phases.PickCard:
+                text += f" - {player_coins} Coins"
+            elif state.manuevers > 0:
+                text +=f"({state.manuevers})"
+                if state.phase == Phases.DestroyArmy:
+                    text +=f" (Target {self.graphic_manager.game.players[state.target_player].name})"
+        return (text, player_color)
+
+    def draw(self):
+        text, player_color = self.view()
+        text_surface = self.graphic_manager.render_text(self.font, text, self.graphic_manager.colors[player_color])
+        return self.graphic_manager.screen.blit(text_surface, (self.graphic_manager.side_menu_x, self.y))
+
+class Player_List_Element:
+    def __init__(self, y, player, graphic_manager):
+        self.y = y
+        self.player = player
+        self.graphic_manager = graphic_manager
+        # self.graphic_manager.side_menu_font
+        self.font = graphic_manager.get_font(24)
+
+    def view(self):
+        game = self.graphic_manager.game
+        player_index = game.players.index(self.player)
+        text = f"{self.player.name} ({game.state.coins[player_index]} Coins) ({game.state.player_armies[player_index]}/{game.max_armies} Armies) ({game.state.player_cities[player_index]}/{game.max_cities} Cities) ({game.state.score[player_index]} Score) "
+        goods = game.state.player_goods(player_index)
+        for good in game.deck.goods.values():
+            if goods[good.index] > 0:
+                text += str(goods[good.index]) + "x" + good.name + "; "
+        if goods[game.deck.joker_index] > 0:
+            text += str(goods[game.deck.joker_index]) + "xJoker; "
+        return text
+
+    def draw(self):
+        text_surface = self.graphic_manager.render_text(self.font, self.view(), self.graphic_manager.colors[self.player.color])
+        return self.graphic_manager.screen.blit(text_surface, (self.graphic_manager.player_list_x, self.y))
+
+class Good_Scoring:
+    def __init__(self, goods, graphic_manager):
+        self.graphic_manager = graphic_manager
+        self.goods = goods
+        self.font = graphic_manager.get_font(24)
+        self.right_margin = 10
+        self.good_scoring_spacing = 20
+
+    def view(self):
+        #The scoring table never changes
+        return None
+
+    def draw(self):
+        rects = []
+        total_goods = len(self.goods)
+        start_y = self.graphic_manager.screen_height - (total_goods * self.good_scoring_spacing + self.right_margin)
+        for index, good in enumerate(self.goods):  # Iterating directly without sorting
+            text = f"{good}: {self.goods[good].score1}, {self.goods[good].score2}, {self.goods[good].score3}, {self.goods[good].score5}"
+            text_surface = self.graphic_manager.render_text(self.font, text, self.graphic_manager.colors["text_default"])
+            text_width = text_surface.get_width()
+            x_position = self.graphic_manager.screen_width - text_width - self.right_margin
+            y_position = start_y + (index * self.good_scoring_spacing)
+            rects.append(self.graphic_manager.screen.blit(text_surface, (x_position, y_position)))
+
+            if y_position + self.good_scoring_spacing > self.graphic_manager.screen_height:
+                break
+        return rects[0].unionall(rects[1:])
+
+#Line under the player list with the progress of the AI search running in the background
+class AI_Status:
+    def __init__(self, y, ai_thread, graphic_manager):
+        self.y = y
+        self.ai_thread = ai_thread
+        self.graphic_manager = graphic_manager
+        self.font = graphic_manager.get_font(24)
+
+    def view(self):
+        if not self.ai_thread.thinking():
+            if self.ai_thread.ai_manager.pondering and self.ai_thread.pondered == self.graphic_manager.game.state.hash:
+                return f"AI is pondering - {self.ai_thread.ai_manager.playouts} playouts"
+            if self.ai_thread.last_seconds > 0:
+                return f"Last AI decision took {self.ai_thread.last_seconds:.1f}s"
+            return ""
+        game = self.graphic_manager.game
+        seconds = time.time() - self.ai_thread.started
+        return f"{game.players[game.state.active_player].name} is thinking - {self.ai_thread.ai_manager.playouts} playouts - {seconds:.1f}s"
+
+    def draw(self):
+        text_surface = self.graphic_manager.render_text(self.font, self.view(), self.graphic_manager.colors["text_default"])
+        return self.graphic_manager.screen.blit(text_surface, (self.graphic_manager.player_list_x, self.y))
+
+#Search stats of the AI drawn over the top left corner of the board
+class Stats_Overlay:
+    def __init__(self, ai_manager, graphic_manager):
+        self.ai_manager = ai_manager
+        self.graphic_manager = graphic_manager
+        self.font = graphic_manager.get_font(20)
+        self.spacing = 18
+        self.margin = 5
+
+    def lines(self):
+        last = self.ai_manager.last_stats.summary()
+        total = self.ai_manager.total_stats.summary()
+        lines = [
+            f"Last decision: {last['seconds']:.2f}s, {last['playouts']} playouts ({last['playouts_per_second']:.0f}/s)",
+            f"Rollout length: {last['average_rollout_length']:.1f}, nodes expanded: {last['nodes_expanded']}",
+            "Time in " + ", ".join(f"{name}: {seconds:.3f}s" for name, seconds in last["timers"].items()),
+            f"All decisions: {total['decisions']} in {total['seconds']:.1f}s ({total['playouts_per_second']:.0f} playouts/s)"
+        ]
+        if last["peak_memory_kb"] is not None:
+            lines.append(f"Peak memory: {last['peak_memory_kb'] / 1024:.0f} MB")
+        return tuple(lines)
+
+    def view(self):
+        return self.lines()
+
+    def draw(self):
+        #Stats lines change with every decision, they are not worth caching
+        text_surfaces = [self.font.render(line, True, self.graphic_manager.colors["text_default"]) for line in self.lines()]
+        width = max(text_surface.get_width() for text_surface in text_surfaces) + 2 * self.margin
+        height = len(text_surfaces) * self.spacing + 2 * self.margin
+        rect = pygame.draw.rect(self.graphic_manager.screen, (0, 0, 0), (0, 0, width, height))
+        for index, text_surface in enumerate(text_surfaces):
+            self.graphic_manager.screen.blit(text_surface, (self.margin, self.margin + index * self.spacing))
+        return rect
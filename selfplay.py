@@ -0,0 +1,131 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import time
+from game import Phases, Player
+from ai_manager import AI_manager, UCT_manager
+from game_setup import create_game
+from game_record import GameRecorder
+
+PLAYER_COLORS = ["player_red", "player_green", "player_blue", "player_yellow", "player_orange"]
+BATCH_SIZE = 500
+
+#Agent spec is "kind:sim_length[:time_budget]", e.g. "uct:400", "flat:20", "uct:1000:0.25" or "batch:2000" (flat with numpy batches)
+def create_agent(spec, seed):
+    kind, _, parameters = spec.partition(":")
+    parameters = parameters.split(":") if parameters else []
+    sim_length = int(parameters[0]) if len(parameters) > 0 else 200
+    time_budget = float(parameters[1]) if len(parameters) > 1 else None
+    if kind == "uct":
+        return UCT_manager(sim_length, time_budget=time_budget, seed=seed)
+    if kind == "flat":
+        return AI_manager(sim_length, time_budget=time_budget, seed=seed)
+    if kind == "batch":
+        return AI_manager(sim_length, time_budget=time_budget, batch_size=BATCH_SIZE, seed=seed)
+    raise ValueError(f"Unknown agent kind: {kind}")
+
+def play_game(task):
+    game_index, agent_specs, seed, record_dir = task
+    #Game and agents get their own streams split from the seed, so a game plays the same in any worker
+    rng = random.Random(seed << 32 | game_index)
+    #Seats rotate every game, so no agent keeps the advantage of playing first
+    seats = [(game_index + seat) % len(agent_specs) for seat in range(len(agent_specs))]
+    players = [Player(f"{agent_specs[agent_index]}#{seat}", True, PLAYER_COLORS[seat]) for seat, agent_index in enumerate(seats)]
+    agents = [create_agent(agent_specs[agent_index], rng.getrandbits(64)) for agent_index in seats]
+    game_seed = rng.getrandbits(64)
+    game = create_game(players, seed=game_seed)
+    recorder = None
+    if record_dir is not None:
+        recorder = GameRecorder(os.path.join(record_dir, f"game_{game_index}.bprc"), game, game_seed)
+    actions = 0
+    start = time.time()
+    while game.state.phase != Phases.EndGame:
+        #One decision and its move per step, AI_loop would take two calls for every move
+        game.apply_move(agents[game.state.active_player].decide(game))
+        actions += 1
+    if recorder is not None:
+        recorder.close()
+    return {
+        "game": game_index,
+        "agents": seats,
+        "scores": list(game.state.score),
+        "winners": [seats[player_index] for player_index in game.state.winners],
+        "actions": actions,
+        "seconds": time.time() - start
+    }
+
+def summarize(agent_specs, results, elapsed):
+    agents = []
+    for agent_index, spec in enumerate(agent_specs):
+        wins = 0
+        draws = 0
+        scores = []
+        for result in results:
+            if agent_index in result["winners"]:
+                if len(result["winners"]) == 1:
+                    wins += 1
+                else:
+                    draws += 1
+            scores.append(result["scores"][result["agents"].index(agent_index)])
+        agents.append({
+            "agent": spec,
+            "games": len(results),
+            "wins": wins,
+            "draws": draws,
+            "win_rate": wins / len(results),
+            "average_score": sum(scores) / len(scores)
+        })
+    return {
+        "games": len(results),
+        "seconds": elapsed,
+        "games_per_second": len(results) / elapsed,
+        "average_game_length": sum(result["actions"] for result in results) / len(results),
+        "average_game_seconds": sum(result["seconds"] for result in results) / len(results),
+        "agents": agents
+    }
+
+def write_summary(summary, path):
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["agent", "games", "wins", "draws", "win_rate", "average_score", "average_game_length", "games_per_second"])
+            for agent in summary["agents"]:
+                writer.writerow([agent["agent"], agent["games"], agent["wins"], agent["draws"], agent["win_rate"], agent["average_score"],
+                                 summary["average_game_length"], summary["games_per_second"]])
+    else:
+        with open(path, "w") as file:
+            json.dump(summary, file, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays AI agents against each other without the GUI")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--agent", action="append", dest="agents", help="kind:sim_length[:time_budget] with kind uct, flat or batch, once per player (2-5)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="selfplay.json", help="summary file, .csv or .json")
+    parser.add_argument("--record", help="directory for a game record of every game, replayed with game_record.py")
+    args = parser.parse_args()
+    agent_specs = args.agents or ["uct:400", "flat:20"]
+    if not 2 <= len(agent_specs) <= len(PLAYER_COLORS):
+        parser.error("between 2 and 5 agents are needed")
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    tasks = [(game_index, agent_specs, args.seed, args.record) for game_index in range(args.games)]
+    start = time.time()
+    if args.workers > 1:
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(play_game, tasks)
+    else:
+        results = [play_game(task) for task in tasks]
+    summary = summarize(agent_specs, results, time.time() - start)
+    write_summary(summary, args.output)
+    for agent in summary["agents"]:
+        print(f"{agent['agent']}: {agent['wins']} wins, {agent['draws']} draws, average score {agent['average_score']:.2f}")
+    print(f"{summary['games']} games in {summary['seconds']:.1f}s ({summary['games_per_second']:.3f} games/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import sys
+import zlib
+import struct
+import argparse
+import weakref
+import random
+from array import array
+from game import Phases, Player, GameState, TileManager, Game, get_zobrist
+from game_setup import create_deck, create_game
+
+#Binary snapshot of a game - layout, players, rules and the whole GameState, without the object graph pickle walks
+#Card, ability and good indices point into the deck, so the game has to be decoded with the same deck it was encoded with
+SNAPSHOT_MAGIC = b"BPSN"
+SNAPSHOT_VERSION = 2
+#Flags of the header
+WITH_RNG = 1
+
+HEADER = struct.Struct("<4sHB")
+PLAYER = struct.Struct("<B")
+RULES = struct.Struct("<HHHHI")
+FIELDS = struct.Struct("<BBHHiiiQ")
+RNG = struct.Struct("<625IBd")
+#Arrays of GameState in the order they are stored, their lengths follow from the board and the players
+ARRAYS = ("armies", "cities", "move_cost", "continent_armies", "continent_cities", "player_armies", "player_cities",
+          "coins", "score", "tile_control", "continent_control", "goods_score", "goods")
+
+#Decks do not change during a game, their fingerprints are worked out once
+FINGERPRINTS = weakref.WeakKeyDictionary()
+
+DEFAULT_DECK = None
+
+def default_deck():
+    #Decoded games share one deck of game_setup, as the games from create_game share its cards
+    global DEFAULT_DECK
+    if DEFAULT_DECK is None:
+        DEFAULT_DECK = create_deck()
+    return DEFAULT_DECK
+
+def deck_fingerprint(deck):
+    #CRC of every good, ability and card, a deck of the same size with other cards gets another fingerprint
+    if deck in FINGERPRINTS:
+        return FINGERPRINTS[deck]
+    parts = [f"{good.name}:{good.score1},{good.score2},{good.score3},{good.score5}" for good in deck.good_list]
+    parts += [f"{type(ability).__name__}:{ability.manuevers}" for ability in deck.abilities]
+    parts += [f"{card.good}:{card.quantity}:{card.isor}:{[ability.index for ability in card.abilities]}" for card in deck.cards]
+    fingerprint = FINGERPRINTS[deck] = zlib.crc32(";".join(parts).encode("utf-8"))
+    return fingerprint
+
+def pack_text(text):
+    data = text.encode("utf-8")
+    return struct.pack("<H", len(data)) + data
+
+def pack_list(values, code):
+    return struct.pack(f"<H{len(values)}{code}", len(values), *values)
+
+def array_bytes(values):
+    #Every count of the game fits in 16 bits, stored values take half the size of the int arrays
+    values = array("h", values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+#Reads the fields back in the order they were packed
+class Snapshot_Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, layout):
+        values = layout.unpack_from(self.data, self.offset)
+        self.offset += layout.size
+        return values
+
+    def text(self):
+        length, = struct.unpack_from("<H", self.data, self.offset)
+        self.offset += 2 + length
+        return str(self.data[self.offset - length:self.offset], "utf-8")
+
+    def list(self, code):
+        length, = struct.unpack_from("<H", self.data, self.offset)
+        values = struct.unpack_from(f"<{length}{code}", self.data, self.offset + 2)
+        self.offset += 2 + struct.calcsize(f"<{length}{code}")
+        return list(values)
+
+    def array_like(self, values):
+        #A new array of the same type and length as a fresh GameState array
+        size = len(values) * 2
+        read = array("h")
+        read.frombytes(self.data[self.offset:self.offset + size])
+        if sys.byteorder == "big":
+            read.byteswap()
+        self.offset += size
+        return array(values.typecode, read)
+
+#rng=False leaves out the random stream of the card draws (2.5 KB), workers that replace it for every playout do not need it
+def encode_game(game, rng=True):
+    state = game.state
+    deck = game.deck
+    parts = [HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, WITH_RNG if rng else 0), pack_text("\n".join(game.board_layout))]
+    parts.append(PLAYER.pack(len(game.players)))
+    for player in game.players:
+        parts += [pack_text(player.name), PLAYER.pack(player.AI), pack_text(player.color)]
+    parts.append(RULES.pack(game.starting_armies, game.max_armies, game.max_cities, game.max_turns, deck_fingerprint(deck)))
+    parts.append(FIELDS.pack(state.phase.value, state.active_player, state.turn, state.manuevers,
+                             -1 if state.target_player is None else state.target_player, -1 if state.active_tile is None else state.active_tile,
+                             state.selected_armies, state.hash))
+    parts.append(pack_list(state.active_cards, "H"))
+    parts.append(pack_list(state.deck_cards, "H"))
+    parts.append(pack_list([ability.index for ability in state.viable_abilities], "H"))
+    parts.append(pack_list(state.winners, "B"))
+    for name in ARRAYS:
+        parts.append(array_bytes(getattr(state, name)))
+    if rng:
+        version, internal, gauss = game.rng.getstate()
+        parts.append(RNG.pack(*internal, gauss is not None, 0.0 if gauss is None else gauss))
+    return b"".join(parts)
+
+def decode_game(data, deck=None):
+    reader = Snapshot_Reader(data)
+    magic, version, flags = reader.unpack(HEADER)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a game snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot version {version} is not supported, only version {SNAPSHOT_VERSION}")
+    if deck is None:
+        deck = default_deck()
+    layout = reader.text().split("\n")
+    player_count, = reader.unpack(PLAYER)
+    players = []
+    for _ in range(player_count):
+        name = reader.text()
+        ai, = reader.unpack(PLAYER)
+        players.append(Player(name, bool(ai), reader.text()))
+    starting_armies, max_armies, max_cities, max_turns, fingerprint = reader.unpack(RULES)
+    if fingerprint != deck_fingerprint(deck):
+        raise ValueError("Snapshot was made with a different deck")
+    goods_count = len(deck.goods)
+
+    game = Game(deck, layout, players, TileManager(), starting_armies, max_armies, max_cities)
+    game.max_turns = max_turns
+    game.create_board()
+    tile_count = len(game.board.tile_list)
+    state = game.state = GameState(tile_count, len(game.board.continent_list), player_count, goods_count + 1)
+    game.zobrist = get_zobrist(tile_count, player_count, goods_count + 1, deck)
+    phase, state.active_player, state.turn, state.manuevers, target_player, active_tile, state.selected_armies, state.hash = reader.unpack(FIELDS)
+    state.phase = Phases(phase)
+    state.target_player = None if target_player == -1 else target_player
+    state.active_tile = None if active_tile == -1 else active_tile
+    state.active_cards = reader.list("H")
+    state.deck_cards = reader.list("H")
+    state.viable_abilities = [deck.abilities[index] for index in reader.list("H")]
+    state.winners = reader.list("B")
+    for name in ARRAYS:
+        setattr(state, name, reader.array_like(getattr(state, name)))
+    #Tile lists are not stored, they follow from the armies and cities
+    for player_index in range(player_count):
+        state.army_tiles[player_index] = tuple(tile_index for tile_index, armies in enumerate(state.armies[player_index::player_count]) if armies > 0)
+        state.city_tiles[player_index] = tuple(tile_index for tile_index, cities in enumerate(state.cities[player_index::player_count]) if cities > 0)
+    if flags & WITH_RNG:
+        values = reader.unpack(RNG)
+        game.rng = random.Random()
+        game.rng.setstate((3, values[:625], values[626] if values[625] else None))
+    return game
+
+def save_game(game, path):
+    with open(path, "wb") as file:
+        file.write(encode_game(game))
+
+def load_game(path, deck=None):
+    with open(path, "rb") as file:
+        return decode_game(file.read(), deck)
+
+#Round trip of every state of seeded random games - the decoded game has to be the same position, with a right hash, and play on the same
+def check_game(seed):
+    #The AI is only needed for the random moves of the check
+    from ai_manager import AI_manager
+    game = create_game(seed=seed)
+    ai = AI_manager(0, seed=seed)
+    moves = 0
+    while True:
+        decoded = decode_game(encode_game(game))
+        if decoded.state.key() != game.state.key() or decoded.state.hash != game.state.hash or not decoded.verify_hash():
+            raise ValueError(f"Snapshot of seed {seed} after {moves} moves does not decode to the same state")
+        if game.state.phase == Phases.EndGame:
+            return moves
+        move = ai.pick_random_instruction(ai.create_options(game))
+        game.apply_move(move)
+        decoded.apply_move(move)
+        if decoded.state.key() != game.state.key():
+            raise ValueError(f"Decoded game of seed {seed} plays move {moves} differently")
+        moves += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks that every state of seeded random games survives a snapshot round trip")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for game_index in range(args.games):
+        moves = check_game(args.seed + game_index)
+        print(f"Seed {args.seed + game_index}: {moves} moves, every snapshot decoded to the same state")
+
+if __name__ == "__main__":
+    main()